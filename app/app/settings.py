@@ -21,12 +21,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-ue&n4ntej=1#_0jum=3i_(inl12h@fzknbds=z0a4p&z66yo-e'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-ue&n4ntej=1#_0jum=3i_(inl12h@fzknbds=z0a4p&z66yo-e',
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = bool(int(os.environ.get('DEBUG', 1)))
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = list(filter(
+    None, os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+))
 
 
 # Application definition
@@ -82,14 +87,96 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASSWORD')
+        'PASSWORD': os.environ.get('DB_PASSWORD'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        # Connections are returned to a per-process pool at the end of each
+        # request; set DB_POOL_MAX_SIZE=0 to connect per request instead.
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'CHECK_INTERVAL': float(
+                os.environ.get('DB_POOL_CHECK_INTERVAL', 30)
+            ),
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+}
+
+# Read replicas, as a comma separated list of hosts. Safe requests of the
+# recipe APIs read from them; see core.db.replicas.
+REPLICA_DATABASES = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host.strip(),
+        TEST={'MIRROR': 'default'},
+    )
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+
+# Set DB_REPLICA_READS=0 to keep every query on the primary. TestCase only
+# allows queries to the databases a test declares, so environments running
+# the tests turn it off and tests opt in with override_settings.
+REPLICA_READS = bool(int(os.environ.get('DB_REPLICA_READS', 1)))
+
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 1))
+REPLICA_LAG_CHECK_INTERVAL = float(
+    os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5)
+)
+# Pins a user to the primary after a write. Must be shared between
+# processes for read-your-writes to hold across workers, like the response
+# caches below.
+REPLICA_STICKY_CACHE_ALIAS = 'default'
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The default cache holds per-user versions of cached responses, so every
+# process serving requests must share it. The local memory default only
+# suits a single process (runserver, tests); with WEB_CONCURRENCY above 1
+# the app refuses to start unless CACHE_BACKEND is shared, e.g.
+# django.core.cache.backends.memcached.PyMemcacheCache.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 30))
+TOKEN_AUTH_CACHE_MAX_SIZE = 10000
+TOKEN_AUTH_SHARED_CACHE_ALIAS = os.environ.get('TOKEN_AUTH_SHARED_CACHE_ALIAS')
+
+# Threads the async views run database work in, per process. More threads
+# than pooled connections would only wait for the pool.
+ASYNC_VIEW_THREADS = int(os.environ.get(
+    'ASYNC_VIEW_THREADS', DATABASES['default']['POOL']['MAX_SIZE'] or 10
+))
+
+RECIPE_AUTOCOMPLETE_CACHE_TTL = int(
+    os.environ.get('RECIPE_AUTOCOMPLETE_CACHE_TTL', 60)
+)
+RECIPE_AUTOCOMPLETE_CACHE_MAX_SIZE = 10000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -133,6 +220,27 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# Where uploaded recipe images are processed: 'thread' (in-process worker
+# pool), 'inline' (in the request) or 'command' (process_recipe_images).
+RECIPE_IMAGE_PROCESSING = os.environ.get('RECIPE_IMAGE_PROCESSING', 'thread')
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+RECIPE_IMAGE_UPLOAD_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_UPLOAD_MAX_BYTES', 20 * 1024 * 1024)
+)
+# Seconds after which unfinished chunked uploads are discarded by the
+# expire_image_uploads command.
+RECIPE_IMAGE_UPLOAD_MAX_AGE = int(
+    os.environ.get('RECIPE_IMAGE_UPLOAD_MAX_AGE', 24 * 60 * 60)
+)
+
+RECIPE_IMAGE_CACHE_DIR = os.environ.get(
+    'RECIPE_IMAGE_CACHE_DIR', '/vol/web/cache/images'
+)
+RECIPE_IMAGE_CACHE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
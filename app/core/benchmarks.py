@@ -0,0 +1,103 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+
+import statistics
+import time
+
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+
+from core.models import Recipe, Tag, Ingredient
+
+
+@contextmanager
+def rolled_back():
+    """Run benchmark writes in a transaction that is always rolled back."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def allow_test_client():
+    """Let django.test clients past ALLOWED_HOSTS, as the test runner does."""
+    return override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+    )
+
+
+def median_time(func, repeat=5):
+    """Return the median wall time of `repeat` calls of func in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+def _bulk_create_in_batches(model, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def seed_recipes(user, recipes, attrs=100, attrs_per_recipe=10,
+                 batch_size=10000):
+    """Create recipes with tags and ingredients for user.
+
+    Every recipe is linked to `attrs_per_recipe` tags and as many
+    ingredients, picked round robin from `attrs` of each.
+    """
+    _bulk_create_in_batches(Tag, (
+        Tag(user=user, name=f"tag {index}") for index in range(attrs)
+    ), batch_size)
+    _bulk_create_in_batches(Ingredient, (
+        Ingredient(user=user, name=f"ingredient {index}")
+        for index in range(attrs)
+    ), batch_size)
+    _bulk_create_in_batches(Recipe, (
+        Recipe(
+            user=user,
+            title=f"recipe {index}",
+            description=f"description of recipe {index}",
+            time_to_get_ready=index % 120 + 1,
+            price=Decimal(index % 10000) / 100,
+        )
+        for index in range(recipes)
+    ), batch_size)
+
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).order_by("id")
+        .values_list("id", flat=True)
+    )
+    for field, model in (("tags", Tag), ("ingredients", Ingredient)):
+        attr_ids = list(
+            model.objects.filter(user=user).order_by("id")
+            .values_list("id", flat=True)
+        )
+        m2m_field = Recipe._meta.get_field(field)
+        through = m2m_field.remote_field.through
+        recipe_column = m2m_field.m2m_column_name()
+        attr_column = m2m_field.m2m_reverse_name()
+        per_recipe = min(attrs_per_recipe, len(attr_ids))
+        _bulk_create_in_batches(through, (
+            through(**{
+                recipe_column: recipe_id,
+                attr_column: attr_ids[(position + offset) % len(attr_ids)],
+            })
+            for position, recipe_id in enumerate(recipe_ids)
+            for offset in range(per_recipe)
+        ), batch_size)
+
+    return recipe_ids
@@ -0,0 +1,147 @@
+"""
+PostgreSQL backend that checks connections out of a shared pool.
+
+Django opens a connection per thread and, with CONN_MAX_AGE = 0, closes
+it at the end of every request. With this backend "closing" returns the
+connection to a process wide pool instead, so requests skip the TCP and
+authentication handshake. Configure it with a POOL dict in the database
+settings; without one, or with MAX_SIZE 0, it behaves like the stock
+backend.
+"""
+
+import threading
+
+import psycopg2.extensions
+import psycopg2.extras
+
+from django.db import connections
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _check(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def _reset(conn):
+    if conn.closed:
+        raise Database.InterfaceError("connection already closed")
+
+    status = conn.get_transaction_status()
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+
+
+def _close(conn):
+    conn.close()
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats(using="default"):
+    """Return the stats of the pool of database `using`, if it has one."""
+    connection = connections[using]
+    pool = getattr(connection, "get_pool", lambda: None)()
+
+    return pool.stats() if pool is not None else None
+
+
+class PooledDatabaseCreation(DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled sessions would keep the test database "in use".
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = PooledDatabaseCreation
+
+    def get_pool_options(self):
+        options = {
+            "MIN_SIZE": 1,
+            "MAX_SIZE": 0,
+            "TIMEOUT": 30.0,
+            "CHECK_INTERVAL": 30.0,
+            "MAX_IDLE": 300.0,
+        }
+        options.update(self.settings_dict.get("POOL") or {})
+
+        return options
+
+    def get_pool(self, conn_params=None):
+        """Return the pool for the current settings, or None if disabled."""
+        options = self.get_pool_options()
+        if not options["MAX_SIZE"]:
+            return None
+
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        # The test runner and _nodb_cursor() switch NAME on the fly, so
+        # pools are keyed by what they connect to, not just the alias.
+        key = (self.alias, tuple(sorted(
+            (name, str(value)) for name, value in conn_params.items()
+        )))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    connect=lambda: Database.connect(**conn_params),
+                    check=_check,
+                    reset=_reset,
+                    close=_close,
+                    min_size=options["MIN_SIZE"],
+                    max_size=options["MAX_SIZE"],
+                    timeout=options["TIMEOUT"],
+                    check_interval=options["CHECK_INTERVAL"],
+                    max_idle=options["MAX_IDLE"],
+                )
+
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        if self._pool is None:
+            return super().get_new_connection(conn_params)
+
+        try:
+            connection = self._pool.getconn()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+
+        # Same session setup as the stock backend, minus the connect.
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+
+        return connection
+
+    def _close(self):
+        pool = getattr(self, "_pool", None)
+        if self.connection is None or pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
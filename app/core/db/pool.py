@@ -0,0 +1,198 @@
+"""
+Thread-safe pool of database connections.
+"""
+
+import collections
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became available in time."""
+
+
+class ConnectionPool:
+    """Keep between min_size and max_size connections open for reuse.
+
+    The pool knows nothing about the database driver: `connect` opens a
+    connection, `check` runs a round trip that raises if the connection
+    is broken, `reset` readies a returned connection for its next user
+    and `close` closes one. Idle connections are checked on checkout
+    once they have been idle for check_interval seconds, and closed
+    once idle for max_idle seconds while above min_size.
+    """
+
+    def __init__(self, connect, check, reset, close, min_size=1,
+                 max_size=10, timeout=30.0, check_interval=30.0,
+                 max_idle=300.0):
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.close = close
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_idle = max_idle
+
+        self._condition = threading.Condition()
+        self._init_state()
+
+    def _init_state(self):
+        self._pid = os.getpid()
+        self._idle = collections.deque()
+        self._size = 0
+        self._waiting = 0
+        self._stats = collections.Counter()
+        self._wait_max = 0.0
+
+    def _after_fork(self):
+        # Connections inherited from the parent process share its sockets;
+        # forget them without closing so the parent's sessions survive.
+        if self._pid != os.getpid():
+            self._init_state()
+
+    def _forget(self, conn):
+        """Drop a connection from the pool; close it outside the lock."""
+        self._size -= 1
+        self._stats["connections_closed"] += 1
+        self._condition.notify()
+
+    def _close_quietly(self, conn):
+        try:
+            self.close(conn)
+        except Exception:
+            pass
+
+    def _take(self, deadline):
+        """Pop an idle (conn, idle_since) or reserve a slot for a new one.
+
+        Must be called with the lock held. Returns (None, None) when the
+        caller should open a connection.
+        """
+        while True:
+            if self._idle:
+                return self._idle.pop()
+            if self._size < self.max_size:
+                self._size += 1
+                return None, None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats["timeouts"] += 1
+                raise PoolTimeout(
+                    f"No connection available within {self.timeout}s "
+                    f"({self._size} open)."
+                )
+            self._waiting += 1
+            try:
+                self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def getconn(self):
+        """Check out a connection, waiting up to timeout for a free one.
+
+        Connecting and health checks run outside the lock, so a slow
+        server doesn't block checkouts of other idle connections.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            with self._condition:
+                self._after_fork()
+                conn, idle_since = self._take(deadline)
+
+            if conn is None:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._stats["connections_opened"] += 1
+                break
+
+            if time.monotonic() - idle_since < self.check_interval:
+                break
+            try:
+                self.check(conn)
+                break
+            except Exception:
+                with self._condition:
+                    self._stats["failed_checks"] += 1
+                    self._forget(conn)
+                self._close_quietly(conn)
+
+        waited = time.monotonic() - start
+        with self._condition:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        return conn
+
+    def putconn(self, conn):
+        """Return a checked out connection to the pool."""
+        try:
+            self.reset(conn)
+        except Exception:
+            healthy = False
+        else:
+            healthy = True
+
+        expired = []
+        with self._condition:
+            if self._pid != os.getpid():
+                return
+            if not healthy:
+                self._forget(conn)
+                expired.append(conn)
+            else:
+                now = time.monotonic()
+                # Most recently used connections are reused first, so the
+                # ones at the left end have been idle the longest.
+                while (
+                    self._idle and self._size > self.min_size
+                    and now - self._idle[0][1] >= self.max_idle
+                ):
+                    expired.append(self._idle.popleft()[0])
+                    self._forget(expired[-1])
+                self._idle.append((conn, now))
+                self._condition.notify()
+
+        for conn in expired:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            for conn in idle:
+                self._forget(conn)
+
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Return counters and current sizes of the pool."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                waiting=self._waiting,
+                wait_time_max=self._wait_max,
+            )
+
+        stats.setdefault("checkouts", 0)
+        stats.setdefault("wait_time", 0.0)
+        if stats["checkouts"]:
+            stats["wait_time_avg"] = stats["wait_time"] / stats["checkouts"]
+
+        return stats
@@ -0,0 +1,168 @@
+"""
+Route reads of safe API requests to read replicas.
+
+Views opt in with ReplicaReadMixin, which picks a replica for GET, HEAD
+and OPTIONS requests and stores it in a context variable for
+ReplicaRouter. Everything else, including all writes, goes to the
+primary. After a write a user is pinned to the primary for
+REPLICA_STICKY_SECONDS, so they read their own writes, and replicas
+lagging more than REPLICA_MAX_LAG seconds are skipped.
+"""
+
+import contextvars
+import random
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.lru import LRUCache
+
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+_lag_cache = LRUCache(
+    max_size=100,
+    ttl=settings.REPLICA_LAG_CHECK_INTERVAL,
+)
+
+# Replay lag in seconds, NULL when the replica isn't streaming from the
+# primary: a replica whose WAL receiver is down has replayed all it
+# received yet falls further behind. An idle primary makes the replay
+# timestamp grow old, so a streaming replica that has replayed everything
+# it received lags 0. Reading the receiver status takes pg_monitor or
+# pg_read_all_stats; without it replicas count as not streaming and reads
+# stay on the primary. A database not in recovery (a primary used as its
+# own replica in development) lags 0.
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def _sticky_key(user_id):
+    return f"db:sticky:{user_id}"
+
+
+def mark_write(user_id):
+    """Pin user to the primary for REPLICA_STICKY_SECONDS."""
+    caches[settings.REPLICA_STICKY_CACHE_ALIAS].set(
+        _sticky_key(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_sticky(user_id):
+    return bool(
+        caches[settings.REPLICA_STICKY_CACHE_ALIAS].get(_sticky_key(user_id))
+    )
+
+
+def replica_lag(alias):
+    """Return the replication lag of alias in seconds, None if unreachable.
+
+    Results are cached in process for REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    lag = _lag_cache.get(alias, default=False)
+    if lag is not False:
+        return lag
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                lag = cursor.fetchone()[0]
+            lag = None if lag is None else float(lag)
+        else:
+            lag = 0.0
+    except DatabaseError:
+        lag = None
+    _lag_cache.set(alias, lag)
+
+    return lag
+
+
+def choose_replica(user_id=None):
+    """Return a replica alias to read from, or None for the primary."""
+    if not settings.REPLICA_READS or not settings.REPLICA_DATABASES:
+        return None
+    if user_id is not None and is_sticky(user_id):
+        return None
+
+    healthy = []
+    for alias in settings.REPLICA_DATABASES:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            healthy.append(alias)
+
+    return random.choice(healthy) if healthy else None
+
+
+@contextmanager
+def use_replica(alias):
+    """Send reads in the block to alias; None means the primary."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the replica chosen for the current request."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Without this, saving an instance read from a replica would
+        # write to the replica it came from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Read from a replica during safe requests of authenticated users."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if request.method in SAFE_METHODS:
+            alias = choose_replica(request.user.id)
+            self._read_alias_token = _read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_read_alias_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+        # Failed requests wrote nothing, and may not be authenticated.
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            mark_write(request.user.id)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,46 @@
+"""
+Django command to compare the recipe list under WSGI and ASGI servers.
+"""
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the recipe list of running servers at the same client "
+        "concurrency: the sync view under a WSGI server (gunicorn), and "
+        "the sync and async views under an ASGI server (uvicorn). Start "
+        "both with the same number of worker processes, e.g. "
+        "`gunicorn -b :8000` and `uvicorn app.asgi:application --port "
+        "8001`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--wsgi-url", required=True)
+        parser.add_argument("--asgi-url", required=True)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sync_path = reverse("recipe:recipe-list")
+        async_path = reverse("recipe:async-recipe-list")
+        runs = [
+            ("wsgi, sync view", options["wsgi_url"], sync_path),
+            ("asgi, sync view", options["asgi_url"], sync_path),
+            ("asgi, async view", options["asgi_url"], async_path),
+        ]
+
+        for label, url, path in runs:
+            self.stdout.write(f"{label} ({url}{path}):")
+            call_command(
+                "loadtest",
+                email=options["email"],
+                url=url,
+                path=path,
+                concurrency=options["concurrency"],
+                requests=options["requests"],
+                stdout=self.stdout,
+            )
@@ -0,0 +1,63 @@
+"""
+Django command to benchmark tag name autocomplete.
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import rolled_back, seed_recipes
+from core.models import Tag
+from recipe.autocomplete import autocomplete, autocomplete_cache
+
+
+class Command(BaseCommand):
+    help = "Measure autocomplete latency percentiles of tag names."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tags", type=int, default=100000)
+        parser.add_argument("--lookups", type=int, default=1000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def measure(self, user, terms, limit, field):
+        timings = []
+        for term in terms:
+            start = time.perf_counter()
+            autocomplete(Tag, user.id, limit=limit, **{field: term})
+            timings.append(time.perf_counter() - start)
+
+        percentiles = statistics.quantiles(timings, n=100)
+        return percentiles[49], percentiles[98]
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="benchmark@example.com",
+            )
+            self.stdout.write("seeding data...")
+            seed_recipes(user, 0, attrs=options["tags"])
+            names = list(
+                Tag.objects.filter(user=user).values_list("name", flat=True)
+            )
+            prefixes = []
+            for _ in range(options["lookups"]):
+                name = rng.choice(names)
+                prefixes.append(name[:rng.randint(1, len(name))])
+
+            for field in ["prefix", "q"]:
+                autocomplete_cache.clear()
+                for label in ["cold", "warm"]:
+                    p50, p99 = self.measure(
+                        user, prefixes, options["limit"], field
+                    )
+                    self.stdout.write(
+                        f"{field} ({label}): p50 {p50 * 1000:.2f}ms, "
+                        f"p99 {p99 * 1000:.2f}ms"
+                    )
+
+            autocomplete_cache.clear()
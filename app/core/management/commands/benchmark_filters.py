@@ -0,0 +1,65 @@
+"""
+Django command to benchmark recipe tag filtering strategies.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import rolled_back, median_time, seed_recipes
+from core.models import Recipe, Tag
+from recipe.filters import filter_by_related, MATCH_ANY, MATCH_ALL
+
+
+class Command(BaseCommand):
+    help = "Compare JOIN+DISTINCT and EXISTS filtering of recipes by tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100000)
+        parser.add_argument("--tags", type=int, default=100)
+        parser.add_argument("--tags-per-recipe", type=int, default=10)
+        parser.add_argument("--filter-tags", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="benchmark@example.com",
+            )
+            self.stdout.write("seeding data...")
+            seed_recipes(
+                user,
+                options["recipes"],
+                attrs=options["tags"],
+                attrs_per_recipe=options["tags_per_recipe"],
+            )
+            tag_ids = list(
+                Tag.objects.filter(user=user).order_by("id")
+                .values_list("id", flat=True)[:options["filter_tags"]]
+            )
+            self.stdout.write(
+                f"{Recipe.tags.through.objects.count()} recipe-tag rows, "
+                f"filtering by {len(tag_ids)} tags"
+            )
+
+            recipes = Recipe.objects.filter(user=user).order_by("-id")
+            strategies = {
+                "join_distinct": recipes.filter(
+                    tags__id__in=tag_ids
+                ).distinct(),
+                "exists_any": filter_by_related(
+                    recipes, "tags", tag_ids, MATCH_ANY
+                ),
+                "exists_all": filter_by_related(
+                    recipes, "tags", tag_ids, MATCH_ALL
+                ),
+            }
+            for name, queryset in strategies.items():
+                timing = median_time(
+                    lambda: list(queryset.values_list("id", flat=True)),
+                    repeat=options["repeat"],
+                )
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(queryset.explain())
+                self.stdout.write(
+                    f"{queryset.count()} rows, median {timing * 1000:.1f}ms"
+                )
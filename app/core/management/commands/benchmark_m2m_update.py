@@ -0,0 +1,99 @@
+"""
+Django command to benchmark recipe tag update strategies.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmarks import rolled_back, median_time
+from core.models import Recipe, Tag
+from recipe.serializers import link_attrs, set_attrs
+
+
+def clear_and_rebuild(recipe, tag_ids):
+    """Update strategy used before diff based updates, for comparison."""
+    current = recipe.tags.count()
+    recipe.tags.clear()
+    link_attrs("tags", [(recipe.id, tag_id) for tag_id in tag_ids])
+
+    return current + len(tag_ids)
+
+
+def diff(recipe, tag_ids):
+    added, removed = set_attrs("tags", {recipe.id: tag_ids})
+
+    return len(added) + len(removed)
+
+
+STRATEGIES = {
+    "clear_and_rebuild": clear_and_rebuild,
+    "diff": diff,
+}
+
+
+def get_edit_patterns(tag_ids, size):
+    """Return {pattern: (initial tag ids, updated tag ids)}."""
+    initial = tag_ids[:size]
+
+    return {
+        "unchanged": (initial, initial),
+        "add one": (initial, initial + [tag_ids[size]]),
+        "remove one": (initial, initial[1:]),
+        "replace one": (initial, initial[1:] + [tag_ids[size]]),
+        "replace all": (initial, tag_ids[size:size * 2]),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare join table writes of recipe tag update strategies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tags-per-recipe", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        size = options["tags_per_recipe"]
+
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="benchmark@example.com",
+            )
+            Tag.objects.bulk_create([
+                Tag(user=user, name=f"tag {index}")
+                for index in range(size * 2)
+            ])
+            tag_ids = list(
+                Tag.objects.filter(user=user).order_by("id")
+                .values_list("id", flat=True)
+            )
+            recipe = Recipe.objects.create(
+                user=user,
+                title="benchmark",
+                time_to_get_ready=5,
+                price=5,
+            )
+
+            patterns = get_edit_patterns(tag_ids, size)
+            for pattern, (initial, updated) in patterns.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(pattern))
+                for name, strategy in STRATEGIES.items():
+                    set_attrs("tags", {recipe.id: initial})
+                    with CaptureQueriesContext(connection) as queries:
+                        rows = strategy(recipe, updated)
+                    statements = sum(
+                        query["sql"].startswith(("INSERT", "DELETE"))
+                        for query in queries
+                    )
+
+                    def run():
+                        set_attrs("tags", {recipe.id: initial})
+                        strategy(recipe, updated)
+
+                    timing = median_time(run, repeat=options["repeat"])
+                    self.stdout.write(
+                        f"{name}: {rows} rows written in {statements} "
+                        f"statements, median {timing * 1000:.2f}ms "
+                        "(including reset)"
+                    )
@@ -0,0 +1,69 @@
+"""
+Django command to benchmark full-text recipe search.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import rolled_back, median_time, seed_recipes
+from core.models import Recipe
+from recipe.search import (
+    match_words,
+    search_enabled,
+    search_recipes,
+    update_search_vectors,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare tsvector search with substring matching of recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1000000)
+        parser.add_argument("--ingredients", type=int, default=100)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=10)
+        parser.add_argument("--query", default="recipe 4242")
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="benchmark@example.com",
+            )
+            self.stdout.write("seeding data...")
+            recipe_ids = seed_recipes(
+                user,
+                options["recipes"],
+                attrs=options["ingredients"],
+                attrs_per_recipe=options["ingredients_per_recipe"],
+            )
+            update_search_vectors(recipe_ids)
+
+            recipes = Recipe.objects.filter(user=user)
+            query = options["query"]
+            strategies = {
+                "icontains": match_words(recipes, query).order_by("-id"),
+            }
+            if search_enabled(recipes.db):
+                strategies["tsvector"] = search_recipes(
+                    recipes, query
+                ).order_by("-search_rank", "-id")
+            else:
+                self.stdout.write(self.style.WARNING(
+                    "Search vectors need Postgres, "
+                    "only the fallback is measured."
+                ))
+
+            for name, queryset in strategies.items():
+                page = queryset[:options["limit"]]
+                timing = median_time(
+                    lambda: list(page.values_list("id", flat=True)),
+                    repeat=options["repeat"],
+                )
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(page.explain())
+                self.stdout.write(
+                    f"{queryset.count()} matches, first {options['limit']} "
+                    f"in median {timing * 1000:.1f}ms"
+                )
@@ -0,0 +1,73 @@
+"""
+Django command to benchmark recipe list serialization.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core.benchmarks import rolled_back, median_time, seed_recipes
+from core.models import Recipe, Tag, Ingredient
+from recipe.fast_serializers import RecipeRowSerializer
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers with the fast recipe row serializer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--attrs-per-recipe", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get("/api/recipe/recipes/")
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="benchmark@example.com",
+            )
+            self.stdout.write("seeding data...")
+            seed_recipes(
+                user,
+                options["recipes"],
+                attrs=100,
+                attrs_per_recipe=options["attrs_per_recipe"],
+            )
+            queryset = Recipe.objects.filter(user=user).order_by("-id")
+
+            for serializer_class in [RecipeSerializer, RecipeDetailSerializer]:
+                def drf():
+                    return JSONRenderer().render(serializer_class(
+                        queryset.prefetch_related(
+                            Prefetch("tags", Tag.objects.order_by("id")),
+                            Prefetch(
+                                "ingredients",
+                                Ingredient.objects.order_by("id"),
+                            ),
+                        ),
+                        many=True,
+                        context={"request": request},
+                    ).data)
+
+                def fast():
+                    row_serializer = RecipeRowSerializer(
+                        serializer_class, request=request
+                    )
+                    return JSONRenderer().render(row_serializer.serialize(
+                        queryset.values(*row_serializer.get_columns())
+                    ))
+
+                drf_time = median_time(drf, repeat=options["repeat"])
+                fast_time = median_time(fast, repeat=options["repeat"])
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(serializer_class.__name__)
+                )
+                self.stdout.write(
+                    f"drf {drf_time * 1000:.1f}ms, "
+                    f"fast {fast_time * 1000:.1f}ms, "
+                    f"{drf_time / fast_time:.1f}x faster, "
+                    f"identical output: {drf() == fast()}"
+                )
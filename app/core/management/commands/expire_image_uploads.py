@@ -0,0 +1,26 @@
+"""
+Django command to discard abandoned chunked image uploads.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipe.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = "Discard unfinished recipe image uploads and their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=settings.RECIPE_IMAGE_UPLOAD_MAX_AGE,
+            help="Discard uploads started more than this many seconds ago.",
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_uploads(options["max_age"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Discarded {expired} image uploads.")
+        )
@@ -0,0 +1,87 @@
+"""
+Django command to print query plans of the recipe API endpoints.
+"""
+
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipe import views
+
+
+ENDPOINTS = [
+    ("recipe list", views.RecipeViewSet, {}),
+    ("recipe list by tags", views.RecipeViewSet, {"tags": "1,2"}),
+    ("recipe list by ingredients", views.RecipeViewSet,
+     {"ingredients": "1,2"}),
+    ("tag list", views.TagViewSet, {}),
+    ("tag list assigned only", views.TagViewSet, {"assigned_only": "1"}),
+    ("ingredient list", views.IngredientViewSet, {}),
+    ("ingredient list assigned only", views.IngredientViewSet,
+     {"assigned_only": "1"}),
+]
+
+
+def get_endpoint_queryset(viewset_class, user, params):
+    """Return the queryset a list request with params would run."""
+    request = Request(APIRequestFactory().get("/", params))
+    request.user = user
+    view = viewset_class(
+        request=request,
+        action="list",
+        format_kwarg=None,
+        args=(),
+        kwargs={},
+    )
+
+    return view.get_queryset()
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN output of the queries run by each API endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--email",
+            help="User to run the queries for. Defaults to the first user.",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (PostgreSQL only).",
+        )
+        parser.add_argument(
+            "--fail-on",
+            help="Fail if any plan matches this regex, e.g. 'Seq Scan'.",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No user to run the queries for.")
+
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        fail_on = options["fail_on"] and re.compile(options["fail_on"])
+        failures = []
+
+        for name, viewset_class, params in ENDPOINTS:
+            queryset = get_endpoint_queryset(viewset_class, user, params)
+            plan = queryset.explain(**explain_options)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+
+            if fail_on and fail_on.search(plan):
+                failures.append(name)
+
+        if failures:
+            raise CommandError(
+                f"Plans matching {options['fail_on']!r}: {', '.join(failures)}"
+            )
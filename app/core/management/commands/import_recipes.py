@@ -0,0 +1,153 @@
+"""
+Django command to import recipes from NDJSON or CSV files.
+"""
+
+import csv
+import json
+import os
+import time
+
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipe.exporters import CSV_NAME_SEPARATOR, EXPORT_RELATED_FIELDS
+from recipe.serializers import RecipeDetailSerializer, bulk_create_recipes
+
+
+def read_ndjson(file, on_error):
+    """Yield the objects of file, passing lines that don't parse to
+    on_error(line number, error) instead."""
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            on_error(line_number, error)
+
+
+def read_csv(file, on_error):
+    """Yield the rows of file with related names as lists, passing rows
+    that don't parse to on_error(line number, error) instead."""
+    reader = csv.DictReader(file)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            on_error(reader.line_num, error)
+            continue
+
+        # DictReader files surplus values under None.
+        if None in row:
+            on_error(
+                reader.line_num,
+                f"expected {len(reader.fieldnames)} fields, "
+                f"got {len(reader.fieldnames) + len(row[None])}",
+            )
+            continue
+
+        for field in EXPORT_RELATED_FIELDS:
+            names = row.get(field) or ""
+            row[field] = [
+                {"name": name}
+                for name in names.split(CSV_NAME_SEPARATOR) if name
+            ]
+        yield row
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+class Command(BaseCommand):
+    help = "Import recipes for a user from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--file-format", choices=list(READERS))
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--offset",
+            type=int,
+            default=0,
+            help="Number of rows to skip, to resume a failed import.",
+        )
+
+    def get_file_format(self, path, file_format):
+        file_format = file_format or os.path.splitext(path)[1].lstrip(".")
+        if file_format not in READERS:
+            raise CommandError(
+                f"Unknown file format {file_format!r}, use --file-format."
+            )
+
+        return file_format
+
+    def validate_batch(self, rows, offset):
+        valid = []
+        for index, row in enumerate(rows, start=offset):
+            serializer = RecipeDetailSerializer(data=row)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                self.stderr.write(f"row {index}: {dict(serializer.errors)}")
+
+        return valid
+
+    def report_line(self, line_number, error):
+        self.stderr.write(f"line {line_number} skipped: {error}")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}.")
+
+        file_format = self.get_file_format(
+            options["path"], options["file_format"]
+        )
+        batch_size = options["batch_size"]
+        offset = options["offset"]
+        imported = 0
+        attr_cache = {}
+        start = time.perf_counter()
+
+        with open(options["path"], newline="") as file:
+            # Lines that don't parse are skipped, not counted as rows, so
+            # offsets stay valid for resuming.
+            rows = islice(
+                READERS[file_format](file, self.report_line), offset, None
+            )
+            while True:
+                try:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    items = self.validate_batch(batch, offset)
+                    with transaction.atomic():
+                        bulk_create_recipes(user, items, attr_cache)
+                except Exception as error:
+                    raise CommandError(
+                        f"Import failed after row {offset}: {error}. "
+                        f"Resume with --offset {offset}."
+                    )
+
+                offset += len(batch)
+                imported += len(items)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{offset} rows processed, {imported} imported "
+                    f"({imported / elapsed:.0f} rows/s)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} recipes in "
+            f"{time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,124 @@
+"""
+Django command to measure API throughput and latency under concurrency.
+"""
+
+import collections
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import allow_test_client
+from core.db.backends.postgresql.base import pool_stats
+
+
+def _finish_request():
+    # What the WSGI handler does on request_finished; the test client
+    # skips it. Inside an atomic block (tests) closing would break it.
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+class Command(BaseCommand):
+    help = "Send concurrent GET requests and report throughput and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--path", default="/api/recipe/recipes/")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server; by default requests are "
+                 "handled in process.",
+        )
+
+    def get_sender(self, url, path, token):
+        headers = {"Authorization": f"Token {token}"}
+        if url:
+            def send():
+                request = urllib.request.Request(
+                    url.rstrip("/") + path, headers=headers
+                )
+                try:
+                    with urllib.request.urlopen(request) as response:
+                        response.read()
+                        return response.status
+                except urllib.error.HTTPError as exc:
+                    return exc.code
+                except urllib.error.URLError:
+                    return "error"
+
+            return send
+
+        local = threading.local()
+
+        def send():
+            if not hasattr(local, "client"):
+                local.client = Client(
+                    HTTP_AUTHORIZATION=headers["Authorization"]
+                )
+            try:
+                return local.client.get(path).status_code
+            finally:
+                _finish_request()
+
+        return send
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}.")
+        token, _ = Token.objects.get_or_create(user=user)
+        send = self.get_sender(options["url"], options["path"], token.key)
+
+        def timed(_):
+            start = time.perf_counter()
+            status = send()
+            return status, time.perf_counter() - start
+
+        requests = range(options["requests"])
+        start = time.perf_counter()
+        with allow_test_client():
+            if options["concurrency"] == 1:
+                results = [timed(index) for index in requests]
+            else:
+                with ThreadPoolExecutor(options["concurrency"]) as executor:
+                    results = list(executor.map(timed, requests))
+        elapsed = time.perf_counter() - start
+
+        timings = [timing for _, timing in results]
+        statuses = collections.Counter(status for status, _ in results)
+        if len(timings) > 1:
+            percentiles = statistics.quantiles(timings, n=100)
+            p50, p99 = percentiles[49], percentiles[98]
+        else:
+            p50 = p99 = timings[0] if timings else 0.0
+
+        self.stdout.write(
+            f"{len(results)} requests in {elapsed:.2f}s, "
+            f"{len(results) / elapsed:.1f} req/s, "
+            f"p50 {p50 * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms"
+        )
+        self.stdout.write("statuses: " + ", ".join(
+            f"{status}: {count}" for status, count in statuses.most_common()
+        ))
+        stats = None if options["url"] else pool_stats()
+        if stats is not None:
+            self.stdout.write("pool: " + ", ".join(
+                f"{name}: {value:.4f}" if isinstance(value, float)
+                else f"{name}: {value}"
+                for name, value in sorted(stats.items())
+            ))
@@ -0,0 +1,63 @@
+"""
+Django command to process pending recipe image uploads.
+"""
+
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import ImageStatus, Recipe
+from recipe.image_processing import process_recipe_image
+
+
+def _process(recipe_id):
+    try:
+        return process_recipe_image(recipe_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Process pending recipe image uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no pending images are left.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Seconds to wait before polling for new uploads.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                recipe_ids = list(
+                    Recipe.objects.filter(image_status=ImageStatus.PENDING)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:options["batch_size"]]
+                )
+                if options["workers"] > 1:
+                    results = list(executor.map(_process, recipe_ids))
+                else:
+                    results = [process_recipe_image(i) for i in recipe_ids]
+                processed += sum(results)
+
+                if len(recipe_ids) < options["batch_size"]:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {processed} recipe images.")
+        )
@@ -0,0 +1,34 @@
+"""
+Django command to fix drifted recipe counts of tags and ingredients.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.counters import recount_recipe_counts
+from recipe.serializers import ATTR_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Recompute recipe_count of tags and ingredients that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--email",
+            help="Only reconcile the tags and ingredients of this user.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["email"]:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}.")
+
+        for field, model in ATTR_FIELDS:
+            queryset = model.objects.all()
+            if user is not None:
+                queryset = queryset.filter(user=user)
+            fixed = recount_recipe_counts(field, queryset)
+            self.stdout.write(f"{field}: {fixed} counts corrected")
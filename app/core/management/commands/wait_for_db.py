@@ -2,24 +2,180 @@
 Django command to wait for db to be available.
 """
 
-from django.core.management.base import BaseCommand
-from psycopg2 import OperationalError as psycopg2OpError
-from django.db.utils import OperationalError
+import random
+import threading
 import time
 
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import OperationalError
+from psycopg2 import OperationalError as psycopg2OpError
+
+
+# How long past the deadline a probe may take to report its own error
+# before it is given up on.
+PROBE_GRACE = 1
+
+# Socket timeout options of the cache backends that connect over the
+# network; the others answer from memory or disk.
+CACHE_TIMEOUT_OPTIONS = {
+    "django.core.cache.backends.memcached.PyMemcacheCache": (
+        "connect_timeout", "timeout",
+    ),
+    "django.core.cache.backends.redis.RedisCache": (
+        "socket_connect_timeout", "socket_timeout",
+    ),
+}
+
+
+class ProbeTimeout(Exception):
+    def __init__(self, label, attempts, error):
+        super().__init__(f"{label}: {attempts} attempts, last error: {error}")
+
 
 class Command(BaseCommand):
-    help = "Django command to wait for database to be available."
+    help = (
+        "Wait for databases and caches to accept connections, probing them "
+        "concurrently with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--databases", nargs="+", default=["default"],
+            help="Database aliases to wait for.",
+        )
+        parser.add_argument(
+            "--caches", nargs="*", default=[],
+            help="Cache aliases to wait for.",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=60,
+            help="Give up after this many seconds.",
+        )
+        parser.add_argument("--initial-delay", type=float, default=0.1)
+        parser.add_argument("--max-delay", type=float, default=5)
 
-    def handle(self, *args, **option):
-        db_check = False
+    def probe_database(self, alias, timeout):
+        # A raw round trip; the system checks would import every app. It
+        # runs on a connection of its own, outside any pool, so connecting
+        # gives up once the time left runs out.
+        connection = connections[alias]
+        settings_dict = dict(connection.settings_dict, POOL=None)
+        if connection.vendor == "postgresql":
+            settings_dict["OPTIONS"] = dict(
+                settings_dict["OPTIONS"], connect_timeout=max(1, int(timeout))
+            )
+        probe = type(connection)(settings_dict, alias)
+        try:
+            with probe.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        finally:
+            probe.close()
+
+    def probe_cache(self, alias, timeout):
+        # A client of its own, like the database probe, so its sockets give
+        # up once the time left runs out.
+        params = dict(settings.CACHES[alias])
+        backend = params.pop("BACKEND")
+        location = params.pop("LOCATION", "")
+        params["OPTIONS"] = dict(params.get("OPTIONS", {}))
+        for option in CACHE_TIMEOUT_OPTIONS.get(backend, ()):
+            params["OPTIONS"][option] = max(1, timeout)
+        cache = import_string(backend)(location, params)
+        try:
+            cache.set("wait_for_db:probe", 1, timeout=1)
+            cache.get("wait_for_db:probe")
+        finally:
+            cache.close()
+
+    def wait(self, label, probe, errors, deadline, options):
+        """Call probe with the seconds left until it succeeds; return
+        (attempts, seconds)."""
+        start = time.monotonic()
+        delay = options["initial_delay"]
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                probe(deadline - time.monotonic())
+                return attempts, time.monotonic() - start
+            except errors as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ProbeTimeout(label, attempts, exc)
+
+                # Jitter keeps replicas of a service from probing in step.
+                time.sleep(min(random.uniform(delay / 2, delay), remaining))
+                delay = min(delay * 2, options["max_delay"])
+
+    def handle(self, *args, **options):
         self.stdout.write("checking database availability...")
-        while db_check is False:
+        deadline = time.monotonic() + options["timeout"]
+        db_errors = (psycopg2OpError, OperationalError)
+        probes = [
+            (
+                f"database '{alias}'",
+                lambda timeout, alias=alias: self.probe_database(
+                    alias, timeout
+                ),
+                db_errors,
+            )
+            for alias in options["databases"]
+        ] + [
+            (
+                f"cache '{alias}'",
+                lambda timeout, alias=alias: self.probe_cache(
+                    alias, timeout
+                ),
+                Exception,
+            )
+            for alias in options["caches"]
+        ]
+
+        # Probes run in daemon threads even when alone, so a hung one can
+        # neither outlast the deadline nor hold the process at exit.
+        results = {}
+
+        def run(label, probe, errors):
             try:
-                self.check(databases=["default"])
-                db_check = True
-            except(psycopg2OpError, OperationalError):
-                self.stdout.write("Database is not ready yet. please wait.")
-                time.sleep(1)
+                results[label] = self.wait(
+                    label, probe, errors, deadline, options
+                )
+            except Exception as exc:
+                results[label] = exc
+
+        threads = [
+            (label, threading.Thread(
+                target=run, args=(label, probe, errors), daemon=True
+            ))
+            for label, probe, errors in probes
+        ]
+        for label, thread in threads:
+            thread.start()
+
+        failed = []
+        for label, thread in threads:
+            remaining = max(deadline - time.monotonic(), 0)
+            thread.join(remaining + PROBE_GRACE)
+            result = results.get(label)
+            if result is None:
+                failed.append(f"{label}: no answer")
+            elif isinstance(result, ProbeTimeout):
+                failed.append(str(result))
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                attempts, seconds = result
+                self.stdout.write(
+                    f"{label} available after {attempts} attempts "
+                    f"in {seconds:.2f}s"
+                )
+
+        if failed:
+            raise CommandError(
+                f"Gave up after {options['timeout']}s: " + "; ".join(failed)
+            )
 
         self.stdout.write(self.style.SUCCESS("Database is available!!"))
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:55
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field).through
+        attr_column = f'{model_name.lower()}_id'
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep_id=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            duplicate_ids = list(
+                model.objects.filter(
+                    user_id=duplicate['user_id'],
+                    name=duplicate['name'],
+                ).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+            )
+            linked = set(through.objects.filter(**{
+                attr_column: duplicate['keep_id'],
+            }).values_list('recipe_id', flat=True))
+            for row in through.objects.filter(**{
+                f'{attr_column}__in': duplicate_ids,
+            }):
+                if row.recipe_id not in linked:
+                    through.objects.create(**{
+                        'recipe_id': row.recipe_id,
+                        attr_column: duplicate['keep_id'],
+                    })
+                    linked.add(row.recipe_id)
+            model.objects.filter(id__in=duplicate_ids).delete()
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Fire the deferred foreign key checks of the rows changed above;
+        # Postgres refuses to ALTER a table with pending trigger events.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='ingredient',
+            name='ingredient_user_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tag_user_name_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='ingredient_user_name_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='tag_user_name_unique'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:02
+
+import core.models
+from django.db import migrations, models
+
+
+def mark_existing_images_ready(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.exclude(image='').exclude(image__isnull=True).update(
+        image_status='ready',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_unique_attr_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'None'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_upload',
+            field=models.FileField(blank=True, null=True, upload_to=core.models.recipe_image_staging_file_path),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(
+            mark_existing_images_ready, migrations.RunPython.noop
+        ),
+    ]
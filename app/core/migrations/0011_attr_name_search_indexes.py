@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:21
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+TABLES = ('core_tag', 'core_ingredient')
+
+
+def create_name_indexes(apps, schema_editor):
+    """Index names for case-insensitive prefix and substring lookups.
+
+    istartswith and icontains compile to UPPER(name::text) LIKE ..., so
+    both indexes are on that expression: a btree with text_pattern_ops
+    serves prefixes within a user, and a trigram GIN index serves
+    substrings.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_name_prefix_idx ON {table} '
+            f'(user_id, UPPER(name::text) text_pattern_ops)'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {table}_name_trgm_idx ON {table} '
+            f'USING gin (UPPER(name::text) gin_trgm_ops)'
+        )
+
+
+def drop_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_prefix_idx')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_name_indexes, drop_name_indexes),
+    ]
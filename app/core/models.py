@@ -1,5 +1,6 @@
 from django.db import models
 
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -19,6 +20,13 @@ def recipe_image_file_path(instance, filename):
     return os.path.join("uploads", "recipe", filename)
 
 
+def recipe_image_staging_file_path(instance, filename):
+    ext = os.path.splitext(filename)[1]
+    filename = f'{uuid.uuid4()}{ext}'
+
+    return os.path.join("uploads", "staging", filename)
+
+
 class UserManager(BaseUserManager):
     """Manager for users."""
 
@@ -56,6 +64,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
+class ImageStatus(models.TextChoices):
+    """Processing state of a recipe image."""
+
+    NONE = "none"
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class Recipe(models.Model):
     """Recipes Model."""
 
@@ -71,24 +88,86 @@ class Recipe(models.Model):
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_upload = models.FileField(
+        null=True,
+        blank=True,
+        upload_to=recipe_image_staging_file_path,
+    )
+    image_status = models.CharField(
+        max_length=16,
+        choices=ImageStatus.choices,
+        default=ImageStatus.NONE,
+    )
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Maintained by recipe.search; GIN-indexed on Postgres only.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-id"],
+                name="recipe_user_id_idx",
+            ),
+            models.Index(
+                fields=["user", "price", "id"],
+                name="recipe_user_price_idx",
+            ),
+            models.Index(
+                fields=["user", "time_to_get_ready", "id"],
+                name="recipe_user_time_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+class RecipeCountMixin:
+    """Keep saves of loaded rows from writing back a stale recipe_count.
+
+    recipe.counters changes the count with F() updates; a plain save()
+    would overwrite one committed after the row was loaded.
+    """
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and \
+                kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "recipe_count"
+            ]
+        super().save(*args, **kwargs)
+
+
+class Tag(RecipeCountMixin, models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         to=settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Maintained by recipe.counters.
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="tag_user_name_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-recipe_count", "name"],
+                name="tag_user_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountMixin, models.Model):
     """Ingredients used for a recipe."""
 
     name = models.CharField(max_length=255)
@@ -96,6 +175,43 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Maintained by recipe.counters.
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="ingredient_user_name_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-recipe_count", "name"],
+                name="ingredient_user_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RecipeImageUpload(models.Model):
+    """Resumable upload of a recipe image, received in chunks."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="image_uploads",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    header_checked = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def part_name(self):
+        return os.path.join("uploads", "partial", f"{self.id}.part")
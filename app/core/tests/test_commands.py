@@ -2,32 +2,435 @@
 Test custom manage.py commands.
 """
 
-from unittest.mock import patch
+import json
+import os
+import tempfile
+import threading
+
+from io import StringIO
+from unittest.mock import ANY, patch
 
 from psycopg2 import OperationalError as Psycopg2Error  # type: ignore
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.core.management.base import CommandError
+from django.db.utils import DatabaseError, OperationalError
+from django.test import (
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+
+from core.models import Recipe, Tag
 
 
-@patch("core.management.commands.wait_for_db.Command.check")
+@patch("core.management.commands.wait_for_db.Command.probe_database")
 class CommandsTest(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
-        patched_check.return_value = True
+    def test_wait_for_db_ready(self, patched_probe):
+        patched_probe.return_value = None
 
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=["default"])
+        patched_probe.assert_called_once_with("default", ANY)
 
+    @patch("random.uniform", side_effect=lambda low, high: high)
     @patch("time.sleep")
-    def test_wait_for_db_fail(self, patched_sleep, patched_check):
-        patched_check.side_effect = [Psycopg2Error] * 2 + \
-            [OperationalError] * 3 + [True]
+    def test_wait_for_db_fail(self, patched_sleep, _, patched_probe):
+        patched_probe.side_effect = [Psycopg2Error] * 2 + \
+            [OperationalError] * 3 + [None]
+
+        call_command("wait_for_db", max_delay=1, stdout=StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with("default", ANY)
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.1, 0.2, 0.4, 0.8, 1],
+        )
+
+    def test_wait_for_db_timeout(self, patched_probe):
+        patched_probe.side_effect = OperationalError("refused")
+
+        with self.assertRaisesMessage(CommandError, "last error: refused"):
+            call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+    def test_wait_for_db_hanging_probe(self, patched_probe):
+        hang = threading.Event()
+        self.addCleanup(hang.set)
+        patched_probe.side_effect = lambda alias, timeout: hang.wait(10)
+
+        with self.assertRaisesMessage(CommandError, "no answer"):
+            call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+    @patch("core.management.commands.wait_for_db.Command.probe_cache")
+    def test_wait_for_databases_and_caches(self, patched_cache, patched_db):
+        out = StringIO()
+
+        call_command(
+            "wait_for_db", databases=["default", "other"],
+            caches=["default"], stdout=out,
+        )
+
+        self.assertEqual(
+            sorted(call.args[0] for call in patched_db.call_args_list),
+            ["default", "other"],
+        )
+        patched_cache.assert_called_once_with("default", ANY)
+        self.assertIn(
+            "cache 'default' available after 1 attempts", out.getvalue()
+        )
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": "memcached:11211",
+    }})
+    @patch("core.management.commands.wait_for_db.import_string")
+    def test_wait_for_cache_socket_timeouts(self, patched_import, _):
+        call_command(
+            "wait_for_db", caches=["default"], timeout=5, stdout=StringIO()
+        )
+
+        location, params = patched_import.return_value.call_args.args
+        self.assertEqual(location, "memcached:11211")
+        for option in ["connect_timeout", "timeout"]:
+            self.assertLessEqual(params["OPTIONS"][option], 5)
+        patched_import.return_value.return_value.close.assert_called_once()
+
+
+class WaitForDbProbeTest(TestCase):
+    """Test wait_for_db against the test database."""
+
+    def test_wait_for_db_probes(self):
+        out = StringIO()
+
+        call_command("wait_for_db", caches=["default"], stdout=out)
+
+        self.assertIn("database 'default' available", out.getvalue())
+
+
+class BenchmarkCommandsTest(TestCase):
+    """Test benchmark commands."""
+
+    def test_benchmark_filters(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_filters",
+            recipes=20,
+            tags=5,
+            tags_per_recipe=2,
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        for strategy in ["join_distinct", "exists_any", "exists_all"]:
+            self.assertIn(strategy, output)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_m2m_update(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_m2m_update",
+            tags_per_recipe=3,
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("clear_and_rebuild: 6 rows written", output)
+        self.assertIn("diff: 0 rows written in 0 statements", output)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_autocomplete(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_autocomplete", tags=50, lookups=20, stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn("prefix (warm): p50", output)
+        self.assertIn("q (cold): p50", output)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_benchmark_serializers(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_serializers", recipes=10, repeat=1, stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn("RecipeDetailSerializer", output)
+        self.assertEqual(output.count("identical output: True"), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_search(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_search",
+            recipes=20,
+            ingredients=5,
+            ingredients_per_recipe=2,
+            query="recipe 7",
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("icontains", output)
+        self.assertIn("matches", output)
+        self.assertFalse(Recipe.objects.exists())
+
+
+class ReconcileRecipeCountsCommandTest(TestCase):
+    """Test reconcile_recipe_counts command."""
+
+    def test_reconcile_recipe_counts(self):
+        user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+        tag = Tag.objects.create(user=user, name="lunch", recipe_count=3)
+        out = StringIO()
+
+        call_command("reconcile_recipe_counts", stdout=out)
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+        self.assertIn("tags: 1 counts corrected", out.getvalue())
+
+    def test_reconcile_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "reconcile_recipe_counts",
+                email="nobody@example.com",
+                stdout=StringIO(),
+            )
+
+
+class ExplainQueriesCommandTest(TestCase):
+    """Test explain_queries command."""
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+
+    def test_explain_queries(self):
+        out = StringIO()
+
+        call_command("explain_queries", stdout=out)
+
+        output = out.getvalue()
+        for name in ["recipe list", "tag list", "ingredient list"]:
+            self.assertIn(name, output)
+
+    def test_explain_queries_fail_on_match(self):
+        with self.assertRaises(CommandError):
+            call_command("explain_queries", fail_on=".", stdout=StringIO())
+
+    def test_explain_queries_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "explain_queries",
+                email="unknown@example.com",
+                stdout=StringIO(),
+            )
+
+
+class ImportRecipesCommandTest(TestCase):
+    """Test import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False
+        )
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(content)
+
+        return file.name
+
+    def write_ndjson(self, rows):
+        return self.write_file(
+            ".ndjson", "".join(json.dumps(row) + "\n" for row in rows)
+        )
+
+    def test_import_ndjson(self):
+        rows = [
+            {
+                "title": f"recipe {index}",
+                "price": "5.00",
+                "time_to_get_ready": 5,
+                "tags": [{"name": "dessert"}, {"name": f"tag {index}"}],
+            }
+            for index in range(5)
+        ]
+        rows.insert(2, {"title": "no price", "time_to_get_ready": 5})
+        path = self.write_ndjson(rows)
+        out = StringIO()
+        err = StringIO()
+
+        call_command(
+            "import_recipes", path, email=self.user.email, batch_size=2,
+            stdout=out, stderr=err,
+        )
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 6)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+        self.assertIn("row 2", err.getvalue())
+        self.assertIn("Imported 5 recipes", out.getvalue())
+
+    def test_import_resume_from_offset(self):
+        rows = [
+            {"title": f"recipe {index}", "price": 5, "time_to_get_ready": 5}
+            for index in range(4)
+        ]
+        path = self.write_ndjson(rows)
+
+        call_command(
+            "import_recipes", path, email=self.user.email, offset=3,
+            stdout=StringIO(),
+        )
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(list(recipes.values_list("title", flat=True)),
+                         ["recipe 3"])
+
+    def test_import_csv(self):
+        path = self.write_file(
+            ".csv",
+            "title,price,time_to_get_ready,tags,ingredients\n"
+            "soup,5.00,10,lunch|dinner,\n",
+        )
+
+        call_command(
+            "import_recipes", path, email=self.user.email, stdout=StringIO()
+        )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)),
+            ["dinner", "lunch"],
+        )
+        self.assertEqual(recipe.ingredients.count(), 0)
+
+    def test_import_skips_malformed_lines(self):
+        path = self.write_file(
+            ".ndjson",
+            '{"title": "a", "price": 5, "time_to_get_ready": 5}\n'
+            "not json\n"
+            '{"title": "b", "price": 5, "time_to_get_ready": 5}\n',
+        )
+        err = StringIO()
+
+        call_command(
+            "import_recipes", path, email=self.user.email,
+            stdout=StringIO(), stderr=err,
+        )
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(sorted(recipes.values_list("title", flat=True)),
+                         ["a", "b"])
+        self.assertIn("line 2 skipped", err.getvalue())
+
+    def test_import_csv_skips_malformed_rows(self):
+        path = self.write_file(
+            ".csv",
+            "title,price,time_to_get_ready\n"
+            "soup,5.00,10,surplus\n"
+            "stew,5.00,10\n",
+        )
+        err = StringIO()
+
+        call_command(
+            "import_recipes", path, email=self.user.email,
+            stdout=StringIO(), stderr=err,
+        )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, "stew")
+        self.assertIn("line 2 skipped", err.getvalue())
+
+    @patch(
+        "core.management.commands.import_recipes.bulk_create_recipes",
+        side_effect=DatabaseError("connection lost"),
+    )
+    def test_import_failure_reports_offset(self, _):
+        path = self.write_ndjson(
+            [{"title": "a", "price": 5, "time_to_get_ready": 5}]
+        )
+
+        with self.assertRaisesMessage(CommandError, "--offset 0"):
+            call_command(
+                "import_recipes", path, email=self.user.email,
+                stdout=StringIO(), stderr=StringIO(),
+            )
+
+
+class LoadTestCommandTest(TestCase):
+    """Test loadtest command."""
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+
+    def test_loadtest_in_process(self):
+        out = StringIO()
+
+        call_command(
+            "loadtest", email="test@example.com", concurrency=1, requests=5,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("5 requests", output)
+        self.assertIn("200: 5", output)
+
+    def test_loadtest_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "loadtest", email="nobody@example.com", stdout=StringIO()
+            )
+
+
+class BenchmarkAsgiCommandTest(LiveServerTestCase):
+    """Test benchmark_asgi command."""
+
+    def test_benchmark_asgi(self):
+        get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+        out = StringIO()
 
-        call_command("wait_for_db")
+        # The live server stands in for both; it runs async views too.
+        call_command(
+            "benchmark_asgi", email="test@example.com", requests=4,
+            concurrency=1, wsgi_url=self.live_server_url,
+            asgi_url=self.live_server_url, stdout=out,
+        )
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=["default"])
+        output = out.getvalue()
+        self.assertIn("asgi, async view", output)
+        self.assertEqual(output.count("statuses: 200: 4"), 3)
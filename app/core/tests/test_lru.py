@@ -0,0 +1,51 @@
+"""Tests for the in-process LRU cache."""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.lru import LRUCache
+
+
+class LRUCacheTest(SimpleTestCase):
+    """Test LRUCache."""
+
+    def test_get_set(self):
+        cache = LRUCache(max_size=2, ttl=10)
+
+        cache.set("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    @patch("core.lru.time.monotonic")
+    def test_entries_expire(self, patched_monotonic):
+        cache = LRUCache(max_size=2, ttl=10)
+        patched_monotonic.return_value = 100
+        cache.set("a", 1)
+
+        patched_monotonic.return_value = 111
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_delete(self):
+        cache = LRUCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+
+        cache.delete("a")
+        cache.delete("missing")
+
+        self.assertIsNone(cache.get("a"))
@@ -0,0 +1,62 @@
+"""
+Test data migrations against databases holding real rows.
+"""
+
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+# Migrating back needs Postgres: 0011 drops the pg_trgm extension.
+@skipUnless(connection.vendor == "postgresql", "needs Postgres")
+class UniqueAttrNamesMigrationTest(TransactionTestCase):
+    """Test 0007 merges duplicate names before adding the constraints."""
+
+    migrate_from = [("core", "0006_user_indexes")]
+    migrate_to = [("core", "0007_unique_attr_names")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes("core")
+        executor.migrate(self.migrate_from)
+        self.apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.latest)
+
+    def test_duplicates_merged(self):
+        Recipe = self.apps.get_model("core", "Recipe")
+        Tag = self.apps.get_model("core", "Tag")
+        user_id = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        ).id
+        kept = Tag.objects.create(user_id=user_id, name="lunch")
+        duplicate = Tag.objects.create(user_id=user_id, name="lunch")
+        recipes = [
+            Recipe.objects.create(
+                user_id=user_id, title=title, price=5, time_to_get_ready=5
+            )
+            for title in ["soup", "stew"]
+        ]
+        recipes[0].tags.add(kept, duplicate)
+        recipes[1].tags.add(duplicate)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+
+        apps = executor.loader.project_state(self.migrate_to).apps
+        Tag = apps.get_model("core", "Tag")
+        Recipe = apps.get_model("core", "Recipe")
+        self.assertEqual(
+            list(Tag.objects.values_list("id", flat=True)), [kept.id]
+        )
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                list(recipe.tags.values_list("id", flat=True)), [kept.id]
+            )
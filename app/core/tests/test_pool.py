@@ -0,0 +1,185 @@
+"""Tests for the database connection pool and pooled backend."""
+
+from unittest.mock import MagicMock, patch
+
+import psycopg2.extensions
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from core.db.backends.postgresql.base import DatabaseWrapper, close_pools
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Test ConnectionPool."""
+
+    def setUp(self):
+        self.opened = []
+        self.closed = []
+        self.check = MagicMock()
+        self.reset = MagicMock()
+
+    def connect(self):
+        conn = object()
+        self.opened.append(conn)
+        return conn
+
+    def create_pool(self, **kwargs):
+        return ConnectionPool(
+            connect=self.connect,
+            check=self.check,
+            reset=self.reset,
+            close=self.closed.append,
+            **kwargs,
+        )
+
+    def test_reuses_returned_connection(self):
+        pool = self.create_pool()
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(len(self.opened), 1)
+        self.reset.assert_called_once_with(conn)
+
+    def test_timeout_when_exhausted(self):
+        pool = self.create_pool(max_size=1, timeout=0.01)
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(
+            connect=MagicMock(side_effect=[OSError, object()]),
+            check=self.check, reset=self.reset, close=self.closed.append,
+            max_size=1,
+        )
+
+        with self.assertRaises(OSError):
+            pool.getconn()
+
+        pool.getconn()
+        self.assertEqual(pool.stats()["size"], 1)
+
+    @patch("core.db.pool.time.monotonic")
+    def test_broken_idle_connection_replaced(self, patched_monotonic):
+        patched_monotonic.return_value = 100
+        pool = self.create_pool(check_interval=30)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.check.side_effect = Exception
+
+        patched_monotonic.return_value = 131
+        new_conn = pool.getconn()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertEqual(self.closed, [conn])
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+
+    def test_reset_failure_discards_connection(self):
+        pool = self.create_pool()
+        conn = pool.getconn()
+        self.reset.side_effect = Exception
+
+        pool.putconn(conn)
+
+        self.assertEqual(self.closed, [conn])
+        self.assertEqual(pool.stats()["size"], 0)
+
+    @patch("core.db.pool.time.monotonic")
+    def test_idle_connections_expire_above_min_size(self, patched_monotonic):
+        patched_monotonic.return_value = 100
+        pool = self.create_pool(min_size=1, max_idle=60)
+        conn1, conn2 = pool.getconn(), pool.getconn()
+        pool.putconn(conn1)
+
+        patched_monotonic.return_value = 200
+        pool.putconn(conn2)
+
+        self.assertEqual(self.closed, [conn1])
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_stats(self):
+        pool = self.create_pool()
+        conn = pool.getconn()
+
+        stats = pool.stats()
+
+        self.assertEqual(stats["checkouts"], 1)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["in_use"], 1)
+        self.assertIn("wait_time_avg", stats)
+        pool.putconn(conn)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_forgets_connections_after_fork(self):
+        pool = self.create_pool()
+        pool.putconn(pool.getconn())
+
+        with patch("core.db.pool.os.getpid", return_value=-1):
+            conn = pool.getconn()
+
+        self.assertEqual(len(self.opened), 2)
+        self.assertIs(conn, self.opened[1])
+        self.assertEqual(self.closed, [])
+
+
+class PooledBackendTest(SimpleTestCase):
+    """Test the pooled PostgreSQL backend."""
+
+    def create_wrapper(self, pool):
+        settings_dict = dict(connections["default"].settings_dict)
+        settings_dict.update(
+            ENGINE="core.db.backends.postgresql",
+            NAME="recipes",
+            USER="user",
+            PASSWORD="password",
+            HOST="localhost",
+            PORT="",
+            OPTIONS={},
+            POOL=pool,
+        )
+
+        return DatabaseWrapper(settings_dict, alias="pool-test")
+
+    def mock_connection(self):
+        conn = MagicMock(closed=0)
+        conn.get_transaction_status.return_value = (
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        return conn
+
+    @patch("psycopg2.extras.register_default_jsonb")
+    @patch("psycopg2.connect")
+    def test_connection_reused_across_close(self, patched_connect, _):
+        self.addCleanup(close_pools)
+        patched_connect.side_effect = lambda **kwargs: self.mock_connection()
+        wrapper = self.create_wrapper({"MAX_SIZE": 2})
+
+        wrapper.connect()
+        first = wrapper.connection
+        wrapper.close()
+        wrapper.connect()
+
+        self.assertIs(wrapper.connection, first)
+        patched_connect.assert_called_once()
+        first.close.assert_not_called()
+        wrapper.close()
+
+    @patch("psycopg2.extras.register_default_jsonb")
+    @patch("psycopg2.connect")
+    def test_pool_disabled(self, patched_connect, _):
+        patched_connect.side_effect = lambda **kwargs: self.mock_connection()
+        wrapper = self.create_wrapper({"MAX_SIZE": 0})
+
+        wrapper.connect()
+        first = wrapper.connection
+        wrapper.close()
+
+        first.close.assert_called_once()
+        self.assertIsNone(wrapper.get_pool())
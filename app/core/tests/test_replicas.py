@@ -0,0 +1,149 @@
+"""Tests for read replica routing."""
+
+from contextlib import ExitStack
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.db import replicas
+from core.db.replicas import (
+    ReplicaRouter,
+    choose_replica,
+    mark_write,
+    use_replica,
+)
+from core.models import Recipe, Tag
+
+
+RECIPE_LIST_URL = reverse("recipe:recipe-list")
+TAG_LIST_URL = reverse("recipe:tag-list")
+
+
+@override_settings(
+    REPLICA_READS=True,
+    REPLICA_DATABASES=["replica_a", "replica_b"],
+    REPLICA_MAX_LAG=1,
+)
+class ChooseReplicaTest(SimpleTestCase):
+    """Test choose_replica and ReplicaRouter."""
+
+    def setUp(self):
+        caches[settings.REPLICA_STICKY_CACHE_ALIAS].clear()
+        patcher = patch("core.db.replicas.replica_lag", return_value=0.0)
+        self.patched_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_choose_replica(self):
+        self.assertIn(choose_replica(1), ["replica_a", "replica_b"])
+
+    def test_lagging_replicas_skipped(self):
+        self.patched_lag.side_effect = lambda alias: {
+            "replica_a": 5.0, "replica_b": None,
+        }[alias]
+
+        self.assertIsNone(choose_replica(1))
+
+        self.patched_lag.side_effect = lambda alias: {
+            "replica_a": 5.0, "replica_b": 0.5,
+        }[alias]
+        self.assertEqual(choose_replica(1), "replica_b")
+
+    def test_sticky_after_write(self):
+        mark_write(1)
+
+        self.assertIsNone(choose_replica(1))
+        self.assertIsNotNone(choose_replica(2))
+
+    @override_settings(REPLICA_READS=False)
+    def test_disabled(self):
+        self.assertIsNone(choose_replica(1))
+
+    def test_router(self):
+        router = ReplicaRouter()
+        recipe = Recipe()
+        recipe._state.db = "replica_a"
+
+        with use_replica("replica_a"):
+            self.assertEqual(router.db_for_read(Recipe), "replica_a")
+            self.assertEqual(
+                router.db_for_write(Recipe, instance=recipe),
+                DEFAULT_DB_ALIAS,
+            )
+        self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate("replica_a", "core"))
+
+
+@skipUnless(settings.REPLICA_DATABASES, "No replica databases configured.")
+@override_settings(REPLICA_READS=True)
+class ReplicaRoutingApiTest(TransactionTestCase):
+    """Test safe API requests read from a replica."""
+
+    databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+
+    def setUp(self):
+        caches[settings.REPLICA_STICKY_CACHE_ALIAS].clear()
+        replicas._lag_cache.clear()
+        self.addCleanup(replicas._lag_cache.clear)
+
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        Tag.objects.create(user=self.user, name="vegan")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, func):
+        """Return the queries func ran on the primary and the replicas."""
+        with ExitStack() as stack:
+            contexts = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in [DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES]
+            ]
+            func()
+
+        return len(contexts[0]), sum(len(c) for c in contexts[1:])
+
+    def test_reads_use_replica(self):
+        primary, replica = self.count_queries(
+            lambda: self.assertEqual(
+                len(self.client.get(TAG_LIST_URL).data), 1
+            )
+        )
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_reads_after_write_use_primary(self):
+        self.client.post(RECIPE_LIST_URL, {
+            "title": "soup", "time_to_get_ready": 5, "price": "5.00",
+        })
+
+        primary, replica = self.count_queries(
+            lambda: self.client.get(RECIPE_LIST_URL)
+        )
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    @patch("core.db.replicas.replica_lag", return_value=60.0)
+    def test_lagging_replica_falls_back_to_primary(self, _):
+        primary, replica = self.count_queries(
+            lambda: self.client.get(TAG_LIST_URL)
+        )
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
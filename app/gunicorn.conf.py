@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for serving app.wsgi in production.
+
+Every setting can be overridden with a GUNICORN_* environment variable.
+Send HUP to the master to gracefully replace the workers; as the app is
+preloaded, deploying new code takes USR2 (start a new master) followed
+by TERM to the old one, or a container restart.
+"""
+
+import multiprocessing
+import os
+
+
+def _env(name, default, cast=int):
+    return cast(os.environ.get(f"GUNICORN_{name}", default))
+
+
+wsgi_app = "app.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Each worker holds its own database pool; keep workers * threads within
+# what Postgres' max_connections can take across all replicas.
+workers = _env("WORKERS", multiprocessing.cpu_count() * 2 + 1)
+# The app refuses per-process caches when it is served by several
+# processes; tell it how many there are.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+# More than one thread switches the sync worker to gthread.
+threads = _env("THREADS", 4)
+
+# Load the app in the master so workers share its memory copy-on-write
+# and start faster.
+preload_app = _env("PRELOAD", 1, lambda value: bool(int(value)))
+
+# Recycle workers after a jittered number of requests to cap the growth
+# of slow memory leaks without restarting all workers at once.
+max_requests = _env("MAX_REQUESTS", 1000)
+max_requests_jitter = _env("MAX_REQUESTS_JITTER", 100)
+
+timeout = _env("TIMEOUT", 30)
+graceful_timeout = _env("GRACEFUL_TIMEOUT", 30)
+keepalive = _env("KEEPALIVE", 5)
+
+# An empty GUNICORN_ACCESSLOG turns access logging off.
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def pre_fork(server, worker):
+    # Workers would share any socket the master opened while preloading.
+    from django.db import connections
+
+    from core.db.backends.postgresql.base import close_pools
+
+    connections.close_all()
+    close_pools()
@@ -0,0 +1,57 @@
+"""
+Async variants of the recipe, tag and ingredient read endpoints.
+
+Under ASGI a sync view runs in a worker thread for the whole request,
+including the time spent sending the response to a slow client. These
+views do the authentication and database work of the matching sync
+endpoint in one hop to a bounded thread pool, so filters, fields,
+cursors and ETags behave the same, and await the response on the event
+loop. Django 3.2 has no async ORM, hence the thread pool.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from recipe import views
+
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS,
+    thread_name_prefix="async-views",
+)
+
+
+def _run_view(view, request, kwargs):
+    try:
+        response = view(request, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+    finally:
+        # Executor threads outlive requests; release their connections
+        # the way request_finished does for sync views.
+        close_old_connections()
+
+
+def async_view(viewset, actions):
+    """Return an async view running `actions` of viewset."""
+    view = viewset.as_view(actions)
+
+    async def handler(request, **kwargs):
+        # Token authentication may query the database, so it runs in the
+        # executor with the rest of the view, never on the event loop.
+        return await sync_to_async(
+            _run_view, thread_sensitive=False, executor=executor
+        )(view, request, kwargs)
+
+    return handler
+
+
+recipe_list = async_view(views.RecipeViewSet, {"get": "list"})
+recipe_detail = async_view(views.RecipeViewSet, {"get": "retrieve"})
+tag_list = async_view(views.TagViewSet, {"get": "list"})
+ingredient_list = async_view(views.IngredientViewSet, {"get": "list"})
@@ -0,0 +1,73 @@
+"""
+Autocomplete lookups of tag and ingredient names.
+"""
+
+from django.conf import settings
+
+from core.lru import LRUCache
+from recipe.cache import get_user_version
+
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+autocomplete_cache = LRUCache(
+    max_size=settings.RECIPE_AUTOCOMPLETE_CACHE_MAX_SIZE,
+    ttl=settings.RECIPE_AUTOCOMPLETE_CACHE_TTL,
+)
+
+
+def _key(model, user_id, version, prefix, q, limit):
+    return (model._meta.label, user_id, version, prefix.casefold(), q, limit)
+
+
+def _query(model, user_id, prefix, q, limit):
+    queryset = model.objects.filter(user_id=user_id)
+    if prefix:
+        queryset = queryset.filter(name__istartswith=prefix)
+    if q:
+        queryset = queryset.filter(name__icontains=q)
+
+    return list(
+        queryset.order_by("name").values("id", "name")[:limit]
+    )
+
+
+def _narrow(rows, prefix, q, limit):
+    prefix = prefix.casefold()
+    q = q.casefold()
+
+    return [
+        row for row in rows
+        if row["name"].casefold().startswith(prefix)
+        and q in row["name"].casefold()
+    ][:limit]
+
+
+def autocomplete(model, user_id, prefix="", q="", limit=DEFAULT_LIMIT):
+    """Return up to limit {id, name} rows of user's names matching.
+
+    `prefix` matches the start of the name and `q` anywhere in it, both
+    ignoring case. Results are cached in-process under the user's data
+    version, so any change to their tags or ingredients invalidates them.
+    While the user types, a longer prefix is answered from the cached
+    result of the shorter one when that result wasn't cut at the limit.
+    """
+    version, _ = get_user_version(user_id)
+    key = _key(model, user_id, version, prefix, q, limit)
+    rows = autocomplete_cache.get(key)
+    if rows is not None:
+        return rows
+
+    if len(prefix) > 1:
+        shorter = autocomplete_cache.get(
+            _key(model, user_id, version, prefix[:-1], q, limit)
+        )
+        if shorter is not None and len(shorter) < limit:
+            rows = _narrow(shorter, prefix, q, limit)
+
+    if rows is None:
+        rows = _query(model, user_id, prefix, q, limit)
+    autocomplete_cache.set(key, rows)
+
+    return rows
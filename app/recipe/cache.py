@@ -0,0 +1,144 @@
+"""
+Per-user versioned response cache for recipe APIs.
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Settings naming caches every server process must see the same data in.
+SHARED_CACHE_SETTINGS = ["RECIPE_CACHE_ALIAS", "REPLICA_STICKY_CACHE_ALIAS"]
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def check_shared_caches():
+    """Refuse per-process caches when several processes serve requests.
+
+    A version bumped by one process would never reach the others, which
+    would keep answering 304 and serving stale lists.
+    """
+    if settings.WEB_CONCURRENCY <= 1:
+        return
+
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name)
+        if isinstance(caches[alias], LocMemCache):
+            raise ImproperlyConfigured(
+                f"{name} uses the per-process cache {alias!r} while "
+                f"WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}; set "
+                f"CACHE_BACKEND and CACHE_LOCATION to a shared cache."
+            )
+
+
+def _version_key(user_id):
+    return f"recipe:version:{user_id}"
+
+
+def _set_user_version(user_id):
+    # Last-Modified has whole second precision, so each version moves it
+    # on by a second at least; a change in the second of an earlier read
+    # must not answer that read's If-Modified-Since with a 304.
+    previous = get_cache().get(_version_key(user_id))
+    modified = time.time()
+    if previous is not None:
+        modified = max(modified, int(previous[1]) + 1)
+    version = (uuid.uuid4().hex, modified)
+    get_cache().set(_version_key(user_id), version, timeout=None)
+
+    return version
+
+
+def get_user_version(user_id):
+    """Return the (version, modified timestamp) of user's recipe data.
+
+    Versions are random, so a version lost to cache eviction is replaced
+    by one that no cached response can match.
+    """
+    version = get_cache().get(_version_key(user_id))
+    if version is None:
+        version = _set_user_version(user_id)
+
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate cached responses of user.
+
+    The version is bumped again on commit, so a response cached by a
+    concurrent request before the commit can't outlive the change.
+    """
+    _set_user_version(user_id)
+    transaction.on_commit(lambda: _set_user_version(user_id))
+
+
+class CachedListMixin:
+    """Serve list responses from a per-user versioned cache with ETags."""
+
+    def get_list_etag(self, request, version):
+        key = ":".join([
+            version,
+            request.accepted_renderer.format,
+            request.build_absolute_uri(),
+        ])
+
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        version, modified = get_user_version(request.user.id)
+        etag = self.get_list_etag(request, version)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(modified),
+            "Cache-Control": "private, no-cache",
+        }
+
+        # If-None-Match wins when both are sent; Last-Modified has whole
+        # second precision.
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            not_modified = etag in parse_etags(if_none_match)
+        else:
+            if_modified_since = parse_http_date_safe(
+                request.headers.get("If-Modified-Since", "")
+            )
+            not_modified = (
+                if_modified_since is not None
+                and int(modified) <= if_modified_since
+            )
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+
+        cache_key = f"recipe:response:{etag}"
+        data = get_cache().get(cache_key)
+        if data is not None:
+            return Response(data, headers=headers)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            get_cache().set(
+                cache_key, response.data, settings.RECIPE_CACHE_TIMEOUT
+            )
+            for header, value in headers.items():
+                response[header] = value
+
+        return response
@@ -0,0 +1,69 @@
+"""
+Denormalized counts of the recipes linked to each tag and ingredient.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe
+
+
+def adjust_recipe_counts(field, pairs, sign=1):
+    """Add sign to recipe_count once per (recipe_id, attr_id) pair.
+
+    Attributes are grouped by their delta so each distinct delta costs a
+    single UPDATE, applied in id order to keep lock order consistent
+    between concurrent transactions.
+    """
+    model = Recipe._meta.get_field(field).related_model
+    by_delta = defaultdict(list)
+    for attr_id, count in Counter(attr_id for _, attr_id in pairs).items():
+        by_delta[sign * count].append(attr_id)
+
+    for delta, attr_ids in by_delta.items():
+        model.objects.filter(
+            id__in=sorted(attr_ids)
+        ).update(recipe_count=F("recipe_count") + delta)
+
+
+def release_recipe_counts(recipe):
+    """Decrement the counts of every tag and ingredient of a recipe."""
+    for field in ("tags", "ingredients"):
+        model = Recipe._meta.get_field(field).related_model
+        model.objects.filter(recipe=recipe).update(
+            recipe_count=F("recipe_count") - 1
+        )
+
+
+def recount_recipe_counts(field, queryset=None):
+    """Recompute drifted recipe counts from the join table.
+
+    Returns the number of corrected rows.
+    """
+    m2m_field = Recipe._meta.get_field(field)
+    model = m2m_field.related_model
+    through = m2m_field.remote_field.through
+    attr_column = m2m_field.m2m_reverse_name()
+
+    actual = Coalesce(
+        Subquery(
+            through.objects.filter(**{attr_column: OuterRef("pk")})
+            .order_by().values(attr_column)
+            .annotate(total=Count("*")).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    if queryset is None:
+        queryset = model.objects.all()
+    drifted = list(
+        queryset.annotate(actual=actual)
+        .exclude(recipe_count=F("actual"))
+        .values_list("id", flat=True)
+    )
+    if drifted:
+        model.objects.filter(id__in=drifted).update(recipe_count=actual)
+
+    return len(drifted)
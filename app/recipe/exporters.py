@@ -0,0 +1,90 @@
+"""
+Streaming exporters for recipes.
+"""
+
+import csv
+import json
+
+from collections import defaultdict
+from itertools import islice
+
+from core.models import Recipe
+
+
+EXPORT_FIELDS = [
+    "id", "title", "time_to_get_ready", "price", "link", "description",
+]
+EXPORT_RELATED_FIELDS = ["tags", "ingredients"]
+CSV_NAME_SEPARATOR = "|"
+
+
+def get_related_by_recipe(field, recipe_ids):
+    """Return {recipe_id: [{"id", "name"}]} for field of recipe_ids."""
+    m2m_field = Recipe._meta.get_field(field)
+    recipe_column = m2m_field.m2m_field_name()
+    attr_name = m2m_field.m2m_reverse_field_name()
+    rows = m2m_field.remote_field.through.objects.filter(**{
+        f"{recipe_column}__in": recipe_ids,
+    }).order_by(f"{attr_name}__id").values_list(
+        f"{recipe_column}_id", f"{attr_name}__id", f"{attr_name}__name",
+    )
+
+    related = defaultdict(list)
+    for recipe_id, attr_id, name in rows:
+        related[recipe_id].append({"id": attr_id, "name": name})
+
+    return related
+
+
+def iter_recipe_rows(queryset, chunk_size=2000):
+    """Yield recipe dicts with their tags and ingredients.
+
+    Recipes are read through a server-side cursor and their related rows
+    are fetched once per chunk, so memory use depends on chunk_size only.
+    """
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        recipe_ids = [row["id"] for row in chunk]
+        related = {
+            field: get_related_by_recipe(field, recipe_ids)
+            for field in EXPORT_RELATED_FIELDS
+        }
+        for row in chunk:
+            row["price"] = str(row["price"])
+            for field in EXPORT_RELATED_FIELDS:
+                row[field] = related[field][row["id"]]
+            yield row
+
+
+def export_ndjson(queryset):
+    for row in iter_recipe_rows(queryset):
+        yield json.dumps(row) + "\n"
+
+
+class _Echo:
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS + EXPORT_RELATED_FIELDS)
+    for row in iter_recipe_rows(queryset):
+        yield writer.writerow(
+            [row[field] for field in EXPORT_FIELDS] + [
+                CSV_NAME_SEPARATOR.join(attr["name"] for attr in row[field])
+                for field in EXPORT_RELATED_FIELDS
+            ]
+        )
+
+
+EXPORTERS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv"),
+}
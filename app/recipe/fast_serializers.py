@@ -0,0 +1,146 @@
+"""
+Read-only serialization of recipes straight from `.values()` rows.
+"""
+
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+
+from rest_framework.fields import DecimalField
+from rest_framework.response import Response
+
+from core.models import Recipe
+from recipe.serializers import (
+    ATTR_FIELD_NAMES,
+    image_endpoint_url,
+    image_variant_urls,
+)
+
+
+def _decimal_field(name):
+    model_field = Recipe._meta.get_field(name)
+
+    return DecimalField(
+        max_digits=model_field.max_digits,
+        decimal_places=model_field.decimal_places,
+    )
+
+
+class RecipeRowSerializer:
+    """Serialize recipes like serializer_class, without model instances.
+
+    Rows come from `.values()` and the nested tags and ingredients from
+    one join table query each, so no ModelSerializer fields run per
+    object. The output matches serializer_class field for field, in the
+    same order, so it renders to the same JSON bytes.
+    """
+
+    def __init__(self, serializer_class, fields=None, request=None):
+        self.fields = [
+            name for name in serializer_class.Meta.fields
+            if fields is None or name in fields
+        ]
+        self.request = request
+        self.converters = {
+            "price": _decimal_field("price").to_representation,
+            "image": self.get_image_url,
+            "image_variants": self.get_image_variants,
+        }
+
+    def get_columns(self):
+        """Return the columns the rows passed to serialize() must have."""
+        columns = ["id"]
+        for name in self.fields:
+            column = "image" if name == "image_url" else name
+            if column not in ATTR_FIELD_NAMES and column not in columns:
+                columns.append(column)
+
+        return columns
+
+    def get_image_url(self, name):
+        if not name:
+            return None
+
+        url = default_storage.url(name)
+        if self.request is not None:
+            url = self.request.build_absolute_uri(url)
+
+        return url
+
+    def get_image_variants(self, variants):
+        return image_variant_urls(variants, self.request)
+
+    def get_nested(self, field, recipe_ids):
+        """Return {recipe_id: [{id, name}]} ordered by id, like prefetch."""
+        m2m_field = Recipe._meta.get_field(field)
+        through = m2m_field.remote_field.through
+        recipe_column = m2m_field.m2m_column_name()
+        attr_column = m2m_field.m2m_reverse_name()
+        attr_name = m2m_field.m2m_reverse_field_name()
+
+        nested = defaultdict(list)
+        rows = through.objects.filter(
+            **{f"{recipe_column}__in": recipe_ids}
+        ).order_by(attr_column).values_list(
+            recipe_column, attr_column, f"{attr_name}__name"
+        )
+        for recipe_id, attr_id, name in rows:
+            nested[recipe_id].append({"id": attr_id, "name": name})
+
+        return nested
+
+    def serialize(self, rows):
+        rows = list(rows)
+        recipe_ids = [row["id"] for row in rows]
+        nested = {
+            field: self.get_nested(field, recipe_ids)
+            for field in self.fields if field in ATTR_FIELD_NAMES
+        }
+
+        data = []
+        for row in rows:
+            item = {}
+            for name in self.fields:
+                if name in nested:
+                    item[name] = nested[name].get(row["id"], [])
+                elif name == "image_url":
+                    item[name] = image_endpoint_url(
+                        row["id"], row["image"], self.request
+                    )
+                elif name in self.converters:
+                    item[name] = self.converters[name](row[name])
+                else:
+                    item[name] = row[name]
+            data.append(item)
+
+        return data
+
+
+class FastListMixin:
+    """List recipes with RecipeRowSerializer.
+
+    Expects the view to provide get_requested_fields() and
+    get_ordering(), like RecipeViewSet.
+    """
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = RecipeRowSerializer(
+            self.get_serializer_class(),
+            fields=self.get_requested_fields(),
+            request=request,
+        )
+        columns = row_serializer.get_columns()
+        # Pagination reads the sort keys of the last row for the cursor.
+        columns += [
+            field.lstrip("-") for field in self.get_ordering()
+            if field.lstrip("-") not in columns
+        ]
+        rows = self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+
+        return Response(row_serializer.serialize(rows))
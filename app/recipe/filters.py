@@ -0,0 +1,36 @@
+"""
+Filters for recipe APIs.
+"""
+
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe
+
+
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+
+
+def related_exists(field, id_list):
+    """Return an EXISTS over the `field` join table for the outer recipe."""
+    m2m_field = Recipe._meta.get_field(field)
+    through_rows = m2m_field.remote_field.through.objects.filter(**{
+        m2m_field.m2m_field_name(): OuterRef("pk"),
+        f"{m2m_field.m2m_reverse_field_name()}__in": id_list,
+    })
+
+    return Exists(through_rows)
+
+
+def filter_by_related(queryset, field, id_list, match=MATCH_ANY):
+    """Filter recipes linked to any or all of `id_list` through `field`.
+
+    Filtering with semi-joins keeps one row per recipe, so the queryset
+    needs no DISTINCT.
+    """
+    if match == MATCH_ALL:
+        for related_id in set(id_list):
+            queryset = queryset.filter(related_exists(field, [related_id]))
+        return queryset
+
+    return queryset.filter(related_exists(field, id_list))
@@ -0,0 +1,168 @@
+"""
+On-demand recipe image variants kept in a size-bounded disk cache.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from PIL import Image
+
+from core.lru import LRUCache
+from recipe.image_processing import VARIANT_FORMATS, decode_image
+
+
+ALLOWED_WIDTHS = (100, 200, 400, 800, 1600)
+# Rescan the cache directory after this many writes, to pick up what
+# other processes wrote.
+RESCAN_WRITES = 1000
+
+# Stored images are never rewritten under the same name, so a digest
+# stays valid for as long as the name is in use.
+_source_digests = LRUCache(max_size=10000, ttl=24 * 60 * 60)
+
+# {cache_dir: [bytes as of the last scan plus writes since, writes since]}
+_usage = {}
+_usage_lock = threading.Lock()
+_scan_lock = threading.Lock()
+
+
+def source_digest(name):
+    """Return the SHA-256 of the content of a stored image file."""
+    digest = _source_digests.get(name)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with default_storage.open(name, "rb") as file:
+            for chunk in file.chunks():
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        _source_digests.set(name, digest)
+
+    return digest
+
+
+def variant_key(digest, width, image_format):
+    """Return the cache key of a variant of the image with digest."""
+    key = f"{digest}:{width}:{image_format}"
+
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def variant_path(key, image_format):
+    ext = VARIANT_FORMATS[image_format][1]
+
+    return os.path.join(settings.RECIPE_IMAGE_CACHE_DIR, key[:2], key + ext)
+
+
+def render_variant(source, width, image_format):
+    with source.open("rb") as file:
+        image = decode_image(file, width)
+    image.thumbnail((width, width), Image.LANCZOS)
+
+    pil_format, _, options = VARIANT_FORMATS[image_format]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+
+    return buffer.getvalue()
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+def evict(cache_dir, max_bytes, keep=None):
+    """Delete least recently used files until the cache fits max_bytes.
+
+    Returns the bytes left in the cache.
+    """
+    entries = []
+    total = 0
+    for directory, _, names in os.walk(cache_dir):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return total
+
+    # Evict down to 90% so the next writes don't trigger another scan.
+    target = max_bytes * 0.9
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+    return total
+
+
+def record_write(cache_dir, max_bytes, size, keep=None):
+    """Account for a file written to the cache, evicting when it's full.
+
+    The directory is only scanned on the first write of the process, once
+    the tracked size passes max_bytes, or every RESCAN_WRITES writes.
+    """
+    with _usage_lock:
+        usage = _usage.setdefault(cache_dir, [None, 0])
+        if usage[0] is not None:
+            usage[0] += size
+            usage[1] += 1
+        if usage[0] is not None and usage[0] <= max_bytes \
+                and usage[1] < RESCAN_WRITES:
+            return
+
+    # One scan at a time; writes meanwhile are counted by the next one.
+    if not _scan_lock.acquire(blocking=False):
+        return
+    try:
+        total = evict(cache_dir, max_bytes, keep=keep)
+        with _usage_lock:
+            _usage[cache_dir] = [total, 0]
+    finally:
+        _scan_lock.release()
+
+
+def get_variant(source, width, image_format):
+    """Return the path of a cached variant of source, rendering it if needed.
+
+    Cache hits are touched so their mtime tracks the last use.
+    """
+    key = variant_key(source_digest(source.name), width, image_format)
+    path = variant_path(key, image_format)
+
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+
+    content = render_variant(source, width, image_format)
+    _write_atomic(path, content)
+    record_write(
+        settings.RECIPE_IMAGE_CACHE_DIR,
+        settings.RECIPE_IMAGE_CACHE_MAX_BYTES,
+        len(content),
+        keep=path,
+    )
+
+    return path
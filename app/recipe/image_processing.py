@@ -0,0 +1,198 @@
+"""
+Background processing of uploaded recipe images.
+"""
+
+import io
+import logging
+import os
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from PIL import Image, ImageOps, features
+
+from core.models import ImageStatus, Recipe
+from recipe.cache import bump_user_version
+
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = {
+    "large": 1600,
+    "thumbnail": 400,
+}
+VARIANT_FORMATS = {
+    "jpeg": ("JPEG", ".jpg", {"quality": 85, "progressive": True}),
+}
+# Pillow built without libwebp has no WEBP encoder; only JPEG is served
+# then.
+if features.check("webp"):
+    VARIANT_FORMATS["webp"] = ("WEBP", ".webp", {"quality": 80, "method": 4})
+# The large JPEG becomes the recipe image served to existing clients.
+MAIN_VARIANT = ("large", "jpeg")
+
+PROCESSING_INLINE = "inline"
+PROCESSING_THREAD = "thread"
+PROCESSING_COMMAND = "command"
+
+_executor = None
+
+
+def decode_image(file, max_size):
+    """Decode an uploaded image once, downscaled to fit max_size."""
+    image = Image.open(file)
+    # Let the JPEG decoder skip detail the largest variant won't keep.
+    image.draft("RGB", (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+
+    return image.convert("RGB")
+
+
+def render_variants(image):
+    """Return {(variant, format): (extension, bytes)} for image."""
+    rendered = {}
+    for variant, width in VARIANT_WIDTHS.items():
+        resized = image.copy()
+        resized.thumbnail((width, width), Image.LANCZOS)
+        for image_format, (pil_format, ext, options) in \
+                VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            rendered[(variant, image_format)] = (ext, buffer.getvalue())
+
+    return rendered
+
+
+def _delete_files(names):
+    for name in names:
+        if name:
+            default_storage.delete(name)
+
+
+def _variant_names(variants):
+    return [
+        name for formats in variants.values() for name in formats.values()
+    ]
+
+
+@transaction.atomic
+def stage_image_upload(recipe, upload):
+    """Stage upload, a file or stored name, for processing into recipe.
+
+    An upload still staged for the recipe, pending or failed, is replaced
+    and its file deleted once the change is committed.
+    """
+    previous = Recipe.objects.select_for_update().values_list(
+        "image_upload", flat=True
+    ).get(id=recipe.id)
+
+    recipe.image_upload = upload
+    recipe.image_status = ImageStatus.PENDING
+    recipe.save(update_fields=["image_upload", "image_status"])
+
+    if previous and previous != recipe.image_upload.name:
+        transaction.on_commit(lambda: _delete_files([previous]))
+
+
+def process_recipe_image(recipe_id):
+    """Turn the staged upload of a recipe into its image variants.
+
+    Returns True if the recipe image was updated.
+    """
+    recipe = Recipe.objects.filter(
+        id=recipe_id, image_status=ImageStatus.PENDING
+    ).first()
+    if recipe is None:
+        return False
+    if not recipe.image_upload:
+        Recipe.objects.filter(id=recipe_id).update(
+            image_status=ImageStatus.FAILED
+        )
+        return False
+
+    staged_name = recipe.image_upload.name
+    prefix = uuid.uuid4()
+    variants = {}
+    try:
+        with recipe.image_upload.open("rb") as file:
+            image = decode_image(file, max(VARIANT_WIDTHS.values()))
+        rendered = render_variants(image)
+        for (variant, image_format), (ext, content) in rendered.items():
+            name = default_storage.save(
+                os.path.join(
+                    "uploads", "recipe", f"{prefix}-{variant}{ext}"
+                ),
+                ContentFile(content),
+            )
+            variants.setdefault(variant, {})[image_format] = name
+    except Exception:
+        # Whatever goes wrong, the recipe must not stay pending forever.
+        logger.exception("Failed to process image of recipe %s", recipe_id)
+        _delete_files(_variant_names(variants))
+        Recipe.objects.filter(
+            id=recipe_id, image_upload=staged_name
+        ).update(image_status=ImageStatus.FAILED)
+        bump_user_version(recipe.user_id)
+        return False
+
+    main_name = variants[MAIN_VARIANT[0]][MAIN_VARIANT[1]]
+    # Only apply the result if no newer upload replaced the staged file.
+    updated = Recipe.objects.filter(
+        id=recipe_id, image_upload=staged_name
+    ).update(
+        image=main_name,
+        image_upload=None,
+        image_variants=variants,
+        image_status=ImageStatus.READY,
+    )
+    if not updated:
+        _delete_files(_variant_names(variants))
+        return False
+
+    _delete_files(
+        [staged_name, recipe.image.name]
+        + _variant_names(recipe.image_variants)
+    )
+    bump_user_version(recipe.user_id)
+
+    return True
+
+
+def _process_in_worker(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception("Image worker failed for recipe %s", recipe_id)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix="recipe-image",
+        )
+
+    return _executor
+
+
+def enqueue_image_processing(recipe_id):
+    """Schedule processing of a staged upload once it is committed.
+
+    With the `command` mode the upload stays pending until the
+    process_recipe_images management command picks it up.
+    """
+    mode = settings.RECIPE_IMAGE_PROCESSING
+    if mode == PROCESSING_INLINE:
+        transaction.on_commit(lambda: process_recipe_image(recipe_id))
+    elif mode == PROCESSING_THREAD:
+        transaction.on_commit(
+            lambda: get_executor().submit(_process_in_worker, recipe_id)
+        )
@@ -0,0 +1,182 @@
+"""
+Keyset pagination for recipe APIs.
+"""
+
+import base64
+import binascii
+import json
+
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in cursor pagination that seeks on the ordering key.
+
+    Pagination is only applied when the client asks for it with
+    `page_size` or `cursor`, so the plain list response is unchanged.
+    Each page filters on the last row of the previous page instead of
+    using OFFSET, so deep pages cost the same as the first one.
+    """
+
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    default_page_size = 50
+    max_page_size = 500
+    ordering = ("-id",)
+
+    def get_ordering(self, view):
+        if hasattr(view, "get_ordering"):
+            return view.get_ordering()
+
+        return self.ordering
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is None:
+            return self.default_page_size
+
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            page_size = 0
+
+        if page_size < 1:
+            raise ValidationError(
+                {self.page_size_query_param: _("Must be a positive integer.")}
+            )
+
+        return min(page_size, self.max_page_size)
+
+    def is_requested(self, request):
+        return (
+            self.page_size_query_param in request.query_params
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_ordering_field(self, queryset, name):
+        """Return the model field or annotation output field of name."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, ordering, queryset):
+        """Return the values of the cursor as the ordering fields' types."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or \
+                    len(values) != len(ordering):
+                raise ValueError("Cursor doesn't match the ordering.")
+
+            decoded = []
+            for field, value in zip(ordering, values):
+                model_field = self.get_ordering_field(
+                    queryset, field.lstrip("-")
+                )
+                if value is None and not model_field.null:
+                    raise ValueError(f"{field} can't be null.")
+                decoded.append(model_field.to_python(value))
+        except (binascii.Error, DjangoValidationError, TypeError, ValueError):
+            raise NotFound(_("Invalid cursor."))
+
+        return decoded
+
+    def encode_cursor(self, values):
+        data = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def get_keyset_filter(self, ordering, values):
+        """Return rows strictly after `values` in `ordering`."""
+        keyset_filter = Q()
+        equal_filter = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            keyset_filter |= equal_filter & Q(**{f"{name}__{lookup}": value})
+            equal_filter &= Q(**{name: value})
+
+        return keyset_filter
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        values = self.decode_cursor(request, self.ordering, queryset)
+        if values is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(self.ordering, values)
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        values = [
+            last[name] if isinstance(last, dict) else getattr(last, name)
+            for name in (field.lstrip("-") for field in self.ordering)
+        ]
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(values),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": _("Number of results per page. "
+                                 "Enables cursor pagination."),
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": _("Cursor from the `next` link."),
+                "schema": {"type": "string"},
+            },
+        ]
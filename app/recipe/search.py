@@ -0,0 +1,87 @@
+"""
+Full-text search over recipe titles, descriptions and ingredient names.
+"""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connections
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+
+from core.models import Recipe, Ingredient
+
+
+SEARCH_CONFIG = "english"
+
+
+def search_enabled(using="default"):
+    """Stored search vectors are only maintained on Postgres."""
+    return connections[using].vendor == "postgresql"
+
+
+def search_vector():
+    """Return the expression computing the search vector of a recipe."""
+    ingredient_names = Ingredient.objects.filter(
+        recipe=OuterRef("pk")
+    ).order_by().values("recipe").annotate(
+        names=StringAgg("name", " ")
+    ).values("names")
+
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names), weight="C", config=SEARCH_CONFIG
+        )
+    )
+
+
+def update_search_vectors(recipe_ids, batch_size=10000):
+    """Recompute the stored search vectors of the given recipes."""
+    if not search_enabled(Recipe.objects.db):
+        return
+
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), batch_size):
+        Recipe.objects.filter(
+            id__in=recipe_ids[start:start + batch_size]
+        ).update(search_vector=search_vector())
+
+
+def match_words(queryset, text):
+    """Filter queryset to recipes containing every word of text.
+
+    Words are matched anywhere in the title, description or ingredient
+    names. This needs no index but scans every recipe of the user.
+    """
+    for word in text.split():
+        queryset = queryset.filter(
+            Exists(Ingredient.objects.filter(
+                recipe=OuterRef("pk"), name__icontains=word
+            ))
+            | Q(title__icontains=word)
+            | Q(description__icontains=word)
+        )
+
+    return queryset
+
+
+def search_recipes(queryset, text):
+    """Filter queryset to recipes matching text.
+
+    On Postgres matches are annotated with `search_rank`, cast to double
+    precision so it survives a round trip through a pagination cursor
+    exactly. Other databases fall back to match_words.
+    """
+    if not search_enabled(queryset.db):
+        return match_words(queryset, text)
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
@@ -1,6 +1,232 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    ChoiceField,
+    DecimalField,
+    DictField,
+    IntegerField,
+    ListField,
+    ModelSerializer,
+    Serializer,
+    SerializerMethodField,
+    ValidationError,
+)
 
-from core.models import Recipe, Tag, Ingredient
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from core.models import (
+    Recipe,
+    RecipeImageUpload,
+    Tag,
+    Ingredient,
+)
+from recipe.cache import bump_user_version
+from recipe.counters import adjust_recipe_counts
+from recipe.image_cache import source_digest
+from recipe.image_processing import stage_image_upload
+from recipe.search import update_search_vectors
+
+
+def get_or_create_attrs(model, user, names):
+    """Return {name: obj} for user's tags or ingredients with names.
+
+    Missing names are inserted with a single bulk INSERT that ignores
+    conflicts, so concurrent requests creating the same name don't fail
+    on the unique constraint; the rows they won are read back instead.
+    """
+    names = set(names)
+    attrs = {
+        attr.name: attr
+        for attr in model.objects.filter(user=user, name__in=names)
+    }
+
+    missing = names - attrs.keys()
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        attrs.update({
+            attr.name: attr
+            for attr in model.objects.filter(user=user, name__in=missing)
+        })
+        bump_user_version(user.id)
+
+    return attrs
+
+
+def link_attrs(field, pairs):
+    """Insert (recipe_id, attr_id) pairs into the join table of field.
+
+    The pairs are expected not to be linked yet; they are all counted
+    in the recipe counts of the attributes.
+    """
+    m2m_field = Recipe._meta.get_field(field)
+    through = m2m_field.remote_field.through
+    recipe_column = m2m_field.m2m_column_name()
+    attr_column = m2m_field.m2m_reverse_name()
+
+    pairs = set(pairs)
+    through.objects.bulk_create(
+        [
+            through(**{recipe_column: recipe_id, attr_column: attr_id})
+            for recipe_id, attr_id in pairs
+        ],
+        ignore_conflicts=True,
+    )
+    adjust_recipe_counts(field, pairs)
+
+
+def set_attrs(field, wanted):
+    """Make the join rows of field match {recipe_id: attr_ids}.
+
+    Only the difference against the current rows is written: one DELETE
+    for the stale rows and one bulk INSERT for the new ones. Returns the
+    added and removed (recipe_id, attr_id) pairs.
+    """
+    m2m_field = Recipe._meta.get_field(field)
+    through = m2m_field.remote_field.through
+    recipe_column = m2m_field.m2m_column_name()
+    attr_column = m2m_field.m2m_reverse_name()
+
+    current = defaultdict(set)
+    rows = through.objects.filter(
+        **{f"{recipe_column}__in": list(wanted)}
+    ).values_list(recipe_column, attr_column)
+    for recipe_id, attr_id in rows:
+        current[recipe_id].add(attr_id)
+
+    added = []
+    removed = []
+    for recipe_id, attr_ids in wanted.items():
+        attr_ids = set(attr_ids)
+        added += [(recipe_id, a) for a in attr_ids - current[recipe_id]]
+        removed += [(recipe_id, a) for a in current[recipe_id] - attr_ids]
+
+    if removed:
+        stale = defaultdict(list)
+        for recipe_id, attr_id in removed:
+            stale[recipe_id].append(attr_id)
+        through.objects.filter(reduce(or_, (
+            Q(**{recipe_column: recipe_id, f"{attr_column}__in": attr_ids})
+            for recipe_id, attr_ids in stale.items()
+        ))).delete()
+        adjust_recipe_counts(field, removed, sign=-1)
+
+    link_attrs(field, added)
+
+    return added, removed
+
+
+ATTR_FIELDS = [("tags", Tag), ("ingredients", Ingredient)]
+ATTR_FIELD_NAMES = {field for field, _ in ATTR_FIELDS}
+
+BULK_MAX_ITEMS = 1000
+
+RECIPE_ORDERINGS = [
+    prefix + field
+    for field in ["id", "price", "time_to_get_ready"]
+    for prefix in ["", "-"]
+]
+
+
+def _set_recipe_attrs(user, recipes_and_data, link_only=False,
+                      attr_cache=None):
+    """Link tags and ingredients named in validated data to recipes.
+
+    attr_cache, a {field: {name: obj}} dict, can be shared by successive
+    calls to skip looking up names that were already resolved.
+    """
+    if attr_cache is None:
+        attr_cache = {}
+
+    for field, model in ATTR_FIELDS:
+        items = [
+            (recipe, data[field])
+            for recipe, data in recipes_and_data
+            if data.get(field) is not None
+        ]
+        attrs = attr_cache.setdefault(field, {})
+        attrs.update(get_or_create_attrs(model, user, {
+            attr["name"] for _, attr_items in items for attr in attr_items
+        } - attrs.keys()))
+        wanted = {
+            recipe.id: [attrs[attr["name"]].id for attr in attr_items]
+            for recipe, attr_items in items
+        }
+
+        if link_only:
+            link_attrs(field, [
+                (recipe_id, attr_id)
+                for recipe_id, attr_ids in wanted.items()
+                for attr_id in attr_ids
+            ])
+        elif wanted:
+            set_attrs(field, wanted)
+
+
+def bulk_create_recipes(user, items, attr_cache=None):
+    """Create recipes for user from validated RecipeSerializer data."""
+    recipes = [
+        Recipe(user=user, **{
+            key: value for key, value in data.items()
+            if key not in ATTR_FIELD_NAMES
+        })
+        for data in items
+    ]
+
+    if connections[Recipe.objects.db].features \
+            .can_return_rows_from_bulk_insert:
+        Recipe.objects.bulk_create(recipes)
+    else:
+        for recipe in recipes:
+            recipe.save()
+
+    _set_recipe_attrs(
+        user, list(zip(recipes, items)), link_only=True, attr_cache=attr_cache
+    )
+    # bulk_create and the join table inserts don't send signals.
+    update_search_vectors([recipe.id for recipe in recipes])
+    bump_user_version(user.id)
+
+    return recipes
+
+
+@transaction.atomic
+def bulk_update_recipes(user, items):
+    """Apply (recipe_id, validated partial data) updates for user."""
+    # Lock the recipes, in id order to avoid deadlocks, so concurrent
+    # updates can't diff against the same join rows and skew the counts.
+    recipes = {
+        recipe.id: recipe
+        for recipe in Recipe.objects.select_for_update().filter(
+            user=user, id__in=[recipe_id for recipe_id, _ in items]
+        ).order_by("id")
+    }
+    fields = set()
+    for recipe_id, data in items:
+        for key, value in data.items():
+            if key not in ATTR_FIELD_NAMES:
+                setattr(recipes[recipe_id], key, value)
+                fields.add(key)
+
+    if fields:
+        Recipe.objects.bulk_update(recipes.values(), fields)
+
+    _set_recipe_attrs(user, [
+        (recipes[recipe_id], data) for recipe_id, data in items
+    ])
+    update_search_vectors(recipes)
+    bump_user_version(user.id)
+
+    return [recipes[recipe_id] for recipe_id, _ in items]
 
 
 class IngredientSerializer(ModelSerializer):
@@ -17,7 +243,18 @@ class TagSerializer(ModelSerializer):
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(ModelSerializer):
+class DynamicFieldsMixin:
+    """Keep only the serializer fields named in the `fields` argument."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(DynamicFieldsMixin, ModelSerializer):
     """Serializer for recipe model preview."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -28,44 +265,57 @@ class RecipeSerializer(ModelSerializer):
                   "price", "link", "tags", "ingredients"]
         read_only_fields = ["id"]
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_attrs(self, model, field, items, recipe):
         user = self.context["request"].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=user,
-                **tag
-            )
-            recipe.tags.add(tag_obj)
+        attrs = get_or_create_attrs(
+            model, user, [item["name"] for item in items]
+        )
+        link_attrs(field, [(recipe.id, attr.id) for attr in attrs.values()])
 
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _set_attrs(self, model, field, items, recipe):
         user = self.context["request"].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=user,
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        attrs = get_or_create_attrs(
+            model, user, [item["name"] for item in items]
+        )
+        set_attrs(field, {recipe.id: [attr.id for attr in attrs.values()]})
 
+    def _get_or_create_tags(self, tags, recipe):
+        self._get_or_create_attrs(Tag, "tags", tags, recipe)
+
+    def _get_or_create_ingredients(self, ingredients, recipe):
+        self._get_or_create_attrs(
+            Ingredient, "ingredients", ingredients, recipe
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
         recipe = Recipe.objects.create(**validated_data)
         self._get_or_create_tags(tags, recipe)
         self._get_or_create_ingredients(ingredients, recipe)
+        if ingredients:
+            update_search_vectors([recipe.id])
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
 
+        if tags is not None or ingredients is not None:
+            # Concurrent updates would diff against the same join rows and
+            # apply the same count changes twice.
+            Recipe.objects.select_for_update().values_list("id").get(
+                id=instance.id
+            )
+
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_attrs(Tag, "tags", tags, instance)
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._set_attrs(Ingredient, "ingredients", ingredients, instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -74,18 +324,227 @@ class RecipeSerializer(ModelSerializer):
         return instance
 
 
-class RecipeDetailSerializer(RecipeSerializer):
+def image_variant_urls(image_variants, request=None):
+    """Render image variant file names as URLs, like FileField does."""
+    variants = {}
+    for variant, formats in image_variants.items():
+        variants[variant] = {}
+        for image_format, name in formats.items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[variant][image_format] = url
+
+    return variants
+
+
+def image_endpoint_url(recipe_id, name, request=None):
+    """Return the URL of the resized image endpoint for image name.
+
+    It names the image content, so its responses can be cached for good;
+    clients add width and image_format to it.
+    """
+    if not name:
+        return None
+
+    try:
+        digest = source_digest(name)
+    except OSError:
+        return None
+    url = reverse("recipe:recipe-image", args=[recipe_id])
+    url += "?" + urlencode({"v": digest})
+    if request is not None:
+        url = request.build_absolute_uri(url)
+
+    return url
+
+
+class ImageVariantsMixin:
+    """Serialize image_variants of a recipe as URLs."""
+
+    def get_image_variants(self, recipe):
+        return image_variant_urls(
+            recipe.image_variants, self.context.get("request")
+        )
+
+
+class RecipeDetailSerializer(ImageVariantsMixin, RecipeSerializer):
     """Serializer for recipe model details."""
 
+    image_variants = SerializerMethodField()
+    image_url = SerializerMethodField()
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ["description", "image"]
+        fields = RecipeSerializer.Meta.fields + [
+            "description", "image", "image_status", "image_variants",
+            "image_url",
+        ]
+        read_only_fields = ["id", "image_status"]
+
+    def get_image_url(self, recipe):
+        return image_endpoint_url(
+            recipe.id, recipe.image.name, self.context.get("request")
+        )
+
 
+class RecipeImageSerializer(ImageVariantsMixin, ModelSerializer):
+    """Serializer for creating image for recipe.
 
-class RecipeImageSerializer(ModelSerializer):
-    """Serializer for creating image for recipe."""
+    The upload is only staged here; the image and its variants are
+    replaced once the image processing worker is done with it.
+    """
+
+    image_variants = SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
-        read_only_fields = ["id"]
+        fields = ["id", "image", "image_status", "image_variants"]
+        read_only_fields = ["id", "image_status"]
         extra_kwargs = {"image": {"required": "True"}}
+
+    def update(self, instance, validated_data):
+        stage_image_upload(instance, validated_data["image"])
+
+        return instance
+
+
+class RecipeImageUploadSerializer(ModelSerializer):
+    """Serializer for resumable recipe image uploads."""
+
+    class Meta:
+        model = RecipeImageUpload
+        fields = ["id", "filename", "size", "offset", "sha256"]
+        read_only_fields = ["id", "offset"]
+
+    def validate_size(self, value):
+        if value < 1 or value > settings.RECIPE_IMAGE_UPLOAD_MAX_BYTES:
+            raise ValidationError(
+                "Must be between 1 and "
+                f"{settings.RECIPE_IMAGE_UPLOAD_MAX_BYTES} bytes."
+            )
+
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or value.strip("0123456789abcdef")):
+            raise ValidationError("Must be a hex encoded SHA-256 digest.")
+
+        return value
+
+
+class RecipeFilterSerializer(Serializer):
+    """Serializer for validating recipe list query parameters."""
+
+    max_time = IntegerField(required=False, min_value=0)
+    min_price = DecimalField(
+        required=False, max_digits=5, decimal_places=2, min_value=0
+    )
+    max_price = DecimalField(
+        required=False, max_digits=5, decimal_places=2, min_value=0
+    )
+    ordering = ChoiceField(required=False, choices=RECIPE_ORDERINGS)
+
+    def validate(self, attrs):
+        min_price = attrs.get("min_price")
+        max_price = attrs.get("max_price")
+        if None not in (min_price, max_price) and min_price > max_price:
+            raise ValidationError(
+                {"max_price": "Must not be less than min_price."}
+            )
+
+        return attrs
+
+
+class RecipeBulkSerializer(Serializer):
+    """Serializer for creating, updating and deleting recipes in bulk."""
+
+    def get_fields(self):
+        # Declared here as the field names clash with create() and update().
+        return {
+            "create": ListField(
+                child=DictField(), required=False, max_length=BULK_MAX_ITEMS
+            ),
+            "update": ListField(
+                child=DictField(), required=False, max_length=BULK_MAX_ITEMS
+            ),
+            "delete": ListField(
+                child=IntegerField(),
+                required=False,
+                max_length=BULK_MAX_ITEMS,
+            ),
+        }
+
+    def _get_update_ids(self, update_items):
+        ids = []
+        for item in update_items:
+            try:
+                ids.append(int(item["id"]))
+            except (KeyError, TypeError, ValueError):
+                ids.append(None)
+
+        return ids
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        create_items = attrs.get("create", [])
+        update_items = attrs.get("update", [])
+        delete_ids = attrs.get("delete", [])
+        errors = {}
+
+        creates = RecipeSerializer(
+            data=create_items, many=True, context=self.context
+        )
+        if not creates.is_valid():
+            errors["create"] = creates.errors
+
+        updates = RecipeSerializer(
+            data=update_items, many=True, partial=True, context=self.context
+        )
+        update_errors = [{} for _ in update_items]
+        if not updates.is_valid():
+            update_errors = [dict(error) for error in updates.errors]
+
+        update_ids = self._get_update_ids(update_items)
+        owned_ids = set(Recipe.objects.filter(
+            user=user,
+            id__in=[i for i in update_ids if i is not None] + delete_ids,
+        ).values_list("id", flat=True))
+
+        for index, recipe_id in enumerate(update_ids):
+            if recipe_id not in owned_ids:
+                update_errors[index]["id"] = ["Recipe not found."]
+            elif recipe_id in delete_ids:
+                update_errors[index]["id"] = ["Recipe is also deleted."]
+        if any(update_errors):
+            errors["update"] = update_errors
+
+        delete_errors = {
+            index: ["Recipe not found."]
+            for index, recipe_id in enumerate(delete_ids)
+            if recipe_id not in owned_ids
+        }
+        if delete_errors:
+            errors["delete"] = delete_errors
+
+        if errors:
+            raise ValidationError(errors)
+
+        return {
+            "create": creates.validated_data,
+            "update": list(zip(update_ids, updates.validated_data)),
+            "delete": delete_ids,
+        }
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context["request"].user
+        Recipe.objects.filter(
+            user=user, id__in=validated_data["delete"]
+        ).delete()
+
+        return {
+            "created": bulk_create_recipes(user, validated_data["create"]),
+            "updated": bulk_update_recipes(user, validated_data["update"]),
+            "deleted": validated_data["delete"],
+        }
@@ -0,0 +1,135 @@
+"""
+Signal handlers keeping recipe caches, search vectors and recipe counts
+in sync with the database.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_user_version
+from recipe.counters import adjust_recipe_counts, release_recipe_counts
+from recipe.search import update_search_vectors
+
+SEARCH_FIELDS = {"title", "description"}
+
+
+@receiver(post_save, sender=get_user_model())
+def bump_new_user_version(sender, instance, created, **kwargs):
+    if created:
+        bump_user_version(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_owner_version(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_relation_owner_version(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields, **kwargs):
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        update_search_vectors([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_ingredient_search_vectors(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            update_search_vectors([instance.id])
+    elif action == "pre_clear":
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        update_search_vectors(instance._search_recipe_ids)
+    elif action in ("post_add", "post_remove"):
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_renamed_ingredient_search_vectors(sender, instance, created,
+                                             **kwargs):
+    if not created:
+        update_search_vectors(
+            instance.recipe_set.values_list("id", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_ingredient_recipes(sender, instance, **kwargs):
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def update_deleted_ingredient_search_vectors(sender, instance, **kwargs):
+    update_search_vectors(getattr(instance, "_search_recipe_ids", []))
+
+
+ATTR_THROUGH_FIELDS = {
+    Recipe.tags.through: "tags",
+    Recipe.ingredients.through: "ingredients",
+}
+
+
+def _linked_pairs(field, instance, reverse, pk_set):
+    """Return the (recipe_id, attr_id) rows of instance limited to pk_set."""
+    m2m_field = Recipe._meta.get_field(field)
+    through = m2m_field.remote_field.through
+    recipe_column = m2m_field.m2m_column_name()
+    attr_column = m2m_field.m2m_reverse_name()
+    own_column, other_column = (
+        (attr_column, recipe_column) if reverse
+        else (recipe_column, attr_column)
+    )
+
+    rows = through.objects.filter(**{own_column: instance.id})
+    if pk_set is not None:
+        rows = rows.filter(**{f"{other_column}__in": pk_set})
+
+    return list(rows.values_list(recipe_column, attr_column))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    field = ATTR_THROUGH_FIELDS[sender]
+    if action == "post_add":
+        adjust_recipe_counts(field, [
+            (pk, instance.id) if reverse else (instance.id, pk)
+            for pk in pk_set
+        ])
+    elif action in ("pre_remove", "pre_clear"):
+        # pk_set may name rows that aren't linked, so count the real ones.
+        instance._removed_pairs = _linked_pairs(
+            field, instance, reverse, pk_set
+        )
+    elif action in ("post_remove", "post_clear"):
+        adjust_recipe_counts(field, instance._removed_pairs, sign=-1)
+        del instance._removed_pairs
+
+
+@receiver(pre_delete, sender=Recipe)
+def release_deleted_recipe_counts(sender, instance, **kwargs):
+    release_recipe_counts(instance)
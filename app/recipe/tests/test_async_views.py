@@ -0,0 +1,115 @@
+"""Tests for the async recipe read endpoints."""
+
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+
+from asgiref.sync import sync_to_async
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from user.authentication import local_token_cache
+
+
+class AsyncViewsTest(TransactionTestCase):
+    """Test async endpoints answer like their sync counterparts."""
+
+    def setUp(self):
+        local_token_cache.clear()
+        self.addCleanup(local_token_cache.clear)
+
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.token = Token.objects.create(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="vegan")
+        Ingredient.objects.create(user=self.user, name="salt")
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"recipe {index}",
+                time_to_get_ready=index + 1,
+                price=5,
+            )
+            recipe.tags.add(tag)
+        self.recipe = recipe
+
+        self.client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}"
+        )
+
+    def get(self, url, params=None, key=None):
+        # AsyncClient of Django 3.2 ignores GET data and takes extra
+        # headers by their name.
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        return self.client.get(
+            url, AUTHORIZATION=f"Token {key or self.token.key}"
+        )
+
+    async def assertParity(self, async_url, sync_url, params=None):
+        res = await self.get(async_url, params)
+        expected = await sync_to_async(self.sync_client.get)(
+            sync_url, params or {}
+        )
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res.json(), expected.json())
+
+    async def test_recipe_list(self):
+        await self.assertParity(
+            reverse("recipe:async-recipe-list"),
+            reverse("recipe:recipe-list"),
+            {"ordering": "price", "fields": "id,title,tags"},
+        )
+
+    async def test_recipe_detail(self):
+        await self.assertParity(
+            reverse("recipe:async-recipe-detail", args=[self.recipe.id]),
+            reverse("recipe:recipe-detail", args=[self.recipe.id]),
+        )
+
+    async def test_tag_and_ingredient_list(self):
+        await self.assertParity(
+            reverse("recipe:async-tag-list"), reverse("recipe:tag-list")
+        )
+        await self.assertParity(
+            reverse("recipe:async-ingredient-list"),
+            reverse("recipe:ingredient-list"),
+        )
+
+    async def test_cached_token(self):
+        url = reverse("recipe:async-tag-list")
+        await self.get(url)
+
+        res = await self.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNotNone(local_token_cache.get(self.token.key))
+
+    async def test_evicted_token(self):
+        url = reverse("recipe:async-tag-list")
+        await self.get(url)
+        local_token_cache.clear()
+
+        res = await self.get(url)
+
+        self.assertEqual(res.status_code, 200)
+
+    async def test_auth_required(self):
+        url = reverse("recipe:async-recipe-list")
+
+        res = await self.client.get(url)
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+        res = await self.get(url, key="invalid")
+        self.assertEqual(res.status_code, 401)
@@ -0,0 +1,136 @@
+"""Tests for the recipe counts of tags and ingredients."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.counters import recount_recipe_counts
+from recipe.serializers import (
+    TagSerializer,
+    bulk_create_recipes,
+    bulk_update_recipes,
+)
+
+
+RECIPE_LIST_URL = reverse("recipe:recipe-list")
+
+
+def create_recipe(user, title="some title"):
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        price=5,
+        time_to_get_ready=5,
+    )
+
+
+class RecipeCountTest(TestCase):
+    """Test recipe_count is kept in sync with the join tables."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.tag1 = Tag.objects.create(user=self.user, name="lunch")
+        self.tag2 = Tag.objects.create(user=self.user, name="vegan")
+
+    def assertCounts(self, model, expected):
+        counts = dict(
+            model.objects.filter(user=self.user)
+            .values_list("name", "recipe_count")
+        )
+        self.assertEqual(counts, expected)
+
+    def test_add_remove_and_clear(self):
+        recipe1 = create_recipe(self.user)
+        recipe2 = create_recipe(self.user)
+
+        recipe1.tags.add(self.tag1, self.tag2)
+        self.tag1.recipe_set.add(recipe2)
+        self.assertCounts(Tag, {"lunch": 2, "vegan": 1})
+
+        recipe1.tags.remove(self.tag2)
+        self.tag1.recipe_set.remove(recipe2)
+        self.assertCounts(Tag, {"lunch": 1, "vegan": 0})
+
+        recipe1.tags.add(self.tag2)
+        recipe1.tags.clear()
+        self.assertCounts(Tag, {"lunch": 0, "vegan": 0})
+
+    def test_add_and_remove_unlinked_ignored(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.tag1)
+
+        recipe.tags.add(self.tag1)
+        recipe.tags.remove(self.tag2)
+
+        self.assertCounts(Tag, {"lunch": 1, "vegan": 0})
+
+    def test_delete_recipe(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.tag1, self.tag2)
+
+        recipe.delete()
+
+        self.assertCounts(Tag, {"lunch": 0, "vegan": 0})
+
+    def test_api_create_and_update(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {
+            "title": "some food",
+            "time_to_get_ready": 5,
+            "price": "5.25",
+            "tags": [{"name": "lunch"}, {"name": "dinner"}],
+            "ingredients": [{"name": "salt"}],
+        }
+        res = client.post(RECIPE_LIST_URL, payload, format="json")
+        self.assertCounts(Tag, {"lunch": 1, "vegan": 0, "dinner": 1})
+        self.assertCounts(Ingredient, {"salt": 1})
+
+        client.patch(
+            reverse("recipe:recipe-detail", args=[res.data["id"]]),
+            {"tags": [{"name": "vegan"}, {"name": "dinner"}]},
+            format="json",
+        )
+
+        self.assertCounts(Tag, {"lunch": 0, "vegan": 1, "dinner": 1})
+
+    def test_bulk_create_and_update(self):
+        recipes = bulk_create_recipes(self.user, [
+            {"title": "a", "time_to_get_ready": 5, "price": 1,
+             "tags": [{"name": "lunch"}]},
+            {"title": "b", "time_to_get_ready": 5, "price": 1,
+             "tags": [{"name": "lunch"}, {"name": "vegan"}]},
+        ])
+        self.assertCounts(Tag, {"lunch": 2, "vegan": 1})
+
+        bulk_update_recipes(self.user, [(recipes[1].id, {"tags": []})])
+
+        self.assertCounts(Tag, {"lunch": 1, "vegan": 0})
+
+    def test_rename_keeps_concurrent_link(self):
+        serializer = TagSerializer(
+            Tag.objects.get(id=self.tag1.id), data={"name": "dinner"}
+        )
+        self.assertTrue(serializer.is_valid())
+
+        create_recipe(self.user).tags.add(self.tag1)
+        serializer.save()
+
+        self.assertCounts(Tag, {"dinner": 1, "vegan": 0})
+
+    def test_recount(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.tag1)
+        Tag.objects.update(recipe_count=7)
+
+        fixed = recount_recipe_counts("tags")
+
+        self.assertEqual(fixed, 2)
+        self.assertCounts(Tag, {"lunch": 1, "vegan": 0})
@@ -0,0 +1,98 @@
+"""Parity tests of the fast recipe serializers."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.fast_serializers import RecipeRowSerializer
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+class RecipeRowSerializerTest(TestCase):
+    """Test RecipeRowSerializer renders the same JSON as DRF serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.request = APIRequestFactory().get("/api/recipe/recipes/")
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ["vegan", "lunch", "ünïcode \"quoted\""]
+        ]
+        salt = Ingredient.objects.create(user=self.user, name="salt")
+        for index, price in enumerate(["5", "5.5", "0.10", "999.99"]):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"recipe {index}",
+                time_to_get_ready=index,
+                price=Decimal(price),
+                description="" if index else "some description",
+                link="https://example.com" if index else "",
+            )
+            recipe.tags.add(*tags[index:])
+            if index % 2:
+                recipe.ingredients.add(salt)
+
+        recipe = Recipe.objects.first()
+        recipe.image.save("image.jpg", ContentFile(b"image"))
+        self.addCleanup(recipe.image.delete, save=False)
+        recipe.image_variants = {"thumbnail": {"webp": "uploads/a.webp"}}
+        recipe.save()
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def assertParity(self, serializer_class, fields=None):
+        queryset = Recipe.objects.order_by("-id")
+        expected = serializer_class(
+            queryset.prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.order_by("id")),
+                Prefetch(
+                    "ingredients", queryset=Ingredient.objects.order_by("id")
+                ),
+            ),
+            many=True,
+            fields=fields,
+            context={"request": self.request},
+        ).data
+
+        row_serializer = RecipeRowSerializer(
+            serializer_class, fields=fields, request=self.request
+        )
+        data = row_serializer.serialize(
+            queryset.values(*row_serializer.get_columns())
+        )
+
+        self.assertEqual(self.render(data), self.render(expected))
+
+    def test_recipe_serializer_parity(self):
+        self.assertParity(RecipeSerializer)
+
+    def test_recipe_detail_serializer_parity(self):
+        self.assertParity(RecipeDetailSerializer)
+
+    def test_sparse_fields_parity(self):
+        self.assertParity(RecipeDetailSerializer, ["title", "tags", "image"])
+
+    def test_without_request_parity(self):
+        self.request = None
+
+        self.assertParity(RecipeDetailSerializer)
+
+    def test_nested_queries(self):
+        row_serializer = RecipeRowSerializer(RecipeSerializer)
+        rows = Recipe.objects.values(*row_serializer.get_columns())
+
+        with self.assertNumQueries(3):
+            row_serializer.serialize(rows)
@@ -13,6 +13,7 @@ from decimal import Decimal
 
 
 INGREDIENT_LIST_URL = reverse("recipe:ingredient-list")
+INGREDIENT_AUTOCOMPLETE_URL = reverse("recipe:ingredient-autocomplete")
 
 
 def ingredient_detail_url(id):
@@ -170,3 +171,12 @@ class PrivateIngredientsAPITest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_ingredients(self):
+        ingredient = create_ingredient(self.user, "Tomato")
+        create_ingredient(self.user, "Potato")
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL, {"prefix": "to"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": ingredient.id, "name": "Tomato"}])
@@ -3,29 +3,67 @@
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
 from django.urls import reverse
+from django.utils import timezone
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import ImageStatus, Recipe, Tag, Ingredient
 
+from recipe import uploads
+from recipe.cache import check_shared_caches
+from recipe.image_cache import source_digest, variant_key
+from recipe.image_processing import process_recipe_image
 from recipe.serializers import (
     RecipeSerializer,
-    RecipeDetailSerializer
+    RecipeDetailSerializer,
+    TagSerializer,
 )
 
+import base64
+import csv
+import hashlib
+import io
+import json
 import os
 import tempfile
 
-from PIL import Image
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from PIL import Image, features
 
 RECIPE_LIST_URL = reverse("recipe:recipe-list")
+RECIPE_BULK_URL = reverse("recipe:recipe-bulk")
+RECIPE_EXPORT_URL = reverse("recipe:recipe-export")
 
 
 def image_upload_url(id):
     return reverse("recipe:recipe-upload-image", args=[id])
 
 
+def image_uploads_url(id):
+    return reverse("recipe:recipe-image-uploads", args=[id])
+
+
+def image_upload_detail_url(id, upload_id):
+    return reverse(
+        "recipe:recipe-image-upload-detail", args=[id, upload_id]
+    )
+
+
+def image_variant_url(id):
+    return reverse("recipe:recipe-image", args=[id])
+
+
 def recipe_detail_url(id):
     return reverse("recipe:recipe-detail", args=[id])
 
@@ -43,6 +81,29 @@ def create_recipe(user, payload={}):
     return Recipe.objects.create(**recipe_detail)
 
 
+def create_recipe_with_relations(user, index):
+    recipe = create_recipe(user, {"title": f"recipe {index}"})
+    recipe.tags.add(Tag.objects.create(user=user, name=f"tag {index}"))
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f"ingredient {index}")
+    )
+
+    return recipe
+
+
+def assert_constant_queries(test_case, client, url, add_rows):
+    """Assert the query count for url doesn't grow with the row count."""
+    query_counts = []
+    for _ in range(2):
+        add_rows()
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(url)
+        test_case.assertEqual(res.status_code, status.HTTP_200_OK)
+        query_counts.append(len(queries))
+
+    test_case.assertEqual(query_counts[0], query_counts[1])
+
+
 class PublicRecipeAPITest(TestCase):
     """Test recipe APIs without authentication."""
 
@@ -102,6 +163,25 @@ class PrivateRecipeAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_recipe_list_constant_queries(self):
+        counter = iter(range(100))
+
+        def add_rows():
+            for _ in range(5):
+                create_recipe_with_relations(self.user, next(counter))
+
+        assert_constant_queries(self, self.client, RECIPE_LIST_URL, add_rows)
+
+    def test_recipe_detail_queries(self):
+        recipe = create_recipe_with_relations(self.user, 0)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="lunch"))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 2)
+
     def test_get_repice_detail(self):
         recipe = create_recipe(self.user)
 
@@ -258,6 +338,43 @@ class PrivateRecipeAPITest(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_tags_constant_queries(self):
+        query_counts = []
+        for count in [2, 10]:
+            recipe_detail = {
+                "title": "some title",
+                "price": 5,
+                "time_to_get_ready": 5,
+                "tags": [{"name": f"tag {i}"} for i in range(count)],
+                "ingredients": [
+                    {"name": f"ingredient {i}"} for i in range(count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    RECIPE_LIST_URL, recipe_detail, format="json"
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 10)
+
+    def test_create_recipe_with_duplicate_tags(self):
+        recipe_detail = {
+            "title": "some title",
+            "price": 5,
+            "time_to_get_ready": 5,
+            "tags": [{"name": "dessert"}, {"name": "dessert"}],
+        }
+
+        res = self.client.post(RECIPE_LIST_URL, recipe_detail, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data["id"])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
     def test_update_tags_of_recipe(self):
         recipe = create_recipe(self.user)
 
@@ -292,6 +409,53 @@ class PrivateRecipeAPITest(TestCase):
         self.assertIn(new_tag, recipe.tags.all())
         self.assertNotIn(tag, recipe.tags.all())
 
+    def test_update_unchanged_tags_writes_nothing(self):
+        tag1 = Tag.objects.create(user=self.user, name="dessert")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag1, tag2)
+
+        tags_detail = {"tags": [{"name": "lunch"}, {"name": "dessert"}]}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                recipe_detail_url(recipe.id),
+                tags_detail,
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        join_table_writes = [
+            query["sql"] for query in queries
+            if "core_recipe_tags" in query["sql"]
+            and query["sql"].startswith(("INSERT", "DELETE"))
+        ]
+        self.assertEqual(join_table_writes, [])
+        self.assertEqual(set(recipe.tags.all()), {tag1, tag2})
+
+    def test_update_tags_writes_only_difference(self):
+        tag1 = Tag.objects.create(user=self.user, name="dessert")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag1, tag2)
+        kept_row = recipe.tags.through.objects.get(tag=tag1)
+
+        tags_detail = {"tags": [{"name": "dessert"}, {"name": "dinner"}]}
+        res = self.client.patch(
+            recipe_detail_url(recipe.id),
+            tags_detail,
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(tag["name"] for tag in res.data["tags"]),
+            ["dessert", "dinner"],
+        )
+        self.assertTrue(
+            recipe.tags.through.objects.filter(id=kept_row.id).exists()
+        )
+        self.assertNotIn(tag2, recipe.tags.all())
+
     def test_clear_tags_for_recipe(self):
         tag = Tag.objects.create(user=self.user, name="dessert")
 
@@ -501,7 +665,642 @@ class PrivateRecipeAPITest(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_tags_match_all(self):
+        tag1 = Tag.objects.create(user=self.user, name="vegeterian")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+
+        recipe1 = create_recipe(self.user)
+        recipe2 = create_recipe(self.user, {"title": "new title"})
+        recipe1.tags.add(tag1)
+        recipe2.tags.add(tag1, tag2)
+
+        params = {"tags": f"{tag1.id},{tag2.id}", "match": "all"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["id"], recipe2.id)
+
+    def test_filter_by_tags_returns_each_recipe_once(self):
+        tag1 = Tag.objects.create(user=self.user, name="vegeterian")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag1, tag2)
+
+        params = {"tags": f"{tag1.id},{tag2.id}"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_filter_invalid_match_error(self):
+        res = self.client.get(RECIPE_LIST_URL, {"match": "some"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_sparse_fields(self):
+        recipe = create_recipe_with_relations(self.user, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_LIST_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": recipe.id, "title": recipe.title}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+
+    def test_list_sparse_fields_with_nested(self):
+        recipe = create_recipe_with_relations(self.user, 0)
+
+        res = self.client.get(RECIPE_LIST_URL, {"fields": "id,tags"})
+
+        self.assertEqual(res.data, [{
+            "id": recipe.id,
+            "tags": TagSerializer(recipe.tags.order_by("id"), many=True).data,
+        }])
+
+    def test_retrieve_sparse_fields(self):
+        recipe = create_recipe(self.user)
+
+        res = self.client.get(
+            recipe_detail_url(recipe.id), {"fields": "description"}
+        )
+
+        self.assertEqual(res.data, {"description": recipe.description})
+
+    def test_sparse_fields_paginated_on_sort_key(self):
+        for price in ["3.00", "1.00", "2.00"]:
+            create_recipe(self.user, {"price": Decimal(price)})
+
+        params = {"fields": "title", "ordering": "price", "page_size": 2}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_LIST_URL, params)
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_field_error(self):
+        res = self.client.get(RECIPE_LIST_URL, {"fields": "id,user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_price_range(self):
+        create_recipe(self.user, {"price": Decimal("2.00")})
+        recipe = create_recipe(self.user, {"price": Decimal("5.50")})
+        create_recipe(self.user, {"price": Decimal("9.00")})
+
+        params = {"min_price": "3", "max_price": "6"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+    def test_filter_by_max_time_with_tags(self):
+        tag = Tag.objects.create(user=self.user, name="quick")
+        recipe = create_recipe(self.user, {"time_to_get_ready": 10})
+        slow = create_recipe(self.user, {"time_to_get_ready": 60})
+        create_recipe(self.user, {"time_to_get_ready": 5})
+        recipe.tags.add(tag)
+        slow.tags.add(tag)
+
+        params = {"max_time": 30, "tags": f"{tag.id}"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+    def test_filter_invalid_range_error(self):
+        for params in [
+            {"max_time": "soon"},
+            {"min_price": "-1"},
+            {"min_price": "8", "max_price": "4"},
+            {"ordering": "title"},
+        ]:
+            res = self.client.get(RECIPE_LIST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering(self):
+        recipe1 = create_recipe(self.user, {"price": Decimal("3.00")})
+        recipe2 = create_recipe(self.user, {"price": Decimal("1.00")})
+        recipe3 = create_recipe(self.user, {"price": Decimal("3.00")})
+
+        res = self.client.get(RECIPE_LIST_URL, {"ordering": "price"})
+        self.assertEqual(
+            [r["id"] for r in res.data], [recipe2.id, recipe1.id, recipe3.id]
+        )
+
+        res = self.client.get(RECIPE_LIST_URL, {"ordering": "-price"})
+        self.assertEqual(
+            [r["id"] for r in res.data], [recipe3.id, recipe1.id, recipe2.id]
+        )
+
+    def test_search(self):
+        recipe1 = create_recipe(self.user, {"title": "Lentil soup"})
+        recipe2 = create_recipe(
+            self.user, {"description": "A creamy tomato soup"}
+        )
+        recipe3 = create_recipe(self.user, {"title": "Salad"})
+        recipe3.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Soup greens")
+        )
+        create_recipe(self.user, {"title": "Pancakes"})
+
+        res = self.client.get(RECIPE_LIST_URL, {"search": "soup"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [recipe["id"] for recipe in res.data],
+            [recipe1.id, recipe2.id, recipe3.id],
+        )
+
+    def test_search_matches_all_words(self):
+        recipe = create_recipe(self.user, {"title": "Lentil soup"})
+        create_recipe(self.user, {"title": "Tomato soup"})
+
+        res = self.client.get(RECIPE_LIST_URL, {"search": "lentil soup"})
+
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+    def test_search_paginated(self):
+        recipes = [
+            create_recipe(self.user, {"title": f"soup {index}"})
+            for index in range(3)
+        ]
+
+        res = self.client.get(
+            RECIPE_LIST_URL, {"search": "soup", "page_size": 2}
+        )
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertCountEqual(ids, [recipe.id for recipe in recipes])
+
+    @skipUnless(connection.vendor == "postgresql", "needs Postgres")
+    def test_search_ranks_title_first(self):
+        in_description = create_recipe(
+            self.user, {"title": "Stew", "description": "Like a soup"}
+        )
+        in_title = create_recipe(self.user, {"title": "Soup"})
+
+        res = self.client.get(RECIPE_LIST_URL, {"search": "soup"})
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data],
+            [in_title.id, in_description.id],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "needs Postgres")
+    def test_search_vector_follows_ingredients(self):
+        recipe = create_recipe(self.user, {"title": "Salad"})
+        ingredient = Ingredient.objects.create(user=self.user, name="Feta")
+        recipe.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPE_LIST_URL, {"search": "feta"})
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+        ingredient.name = "Halloumi"
+        ingredient.save()
+        res = self.client.get(RECIPE_LIST_URL, {"search": "feta"})
+        self.assertEqual(res.data, [])
+
+
+class BulkRecipeAPITest(TestCase):
+    """Test bulk create, update and delete of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_recipes(self):
+        Tag.objects.create(user=self.user, name="dessert")
+        payload = {"create": [
+            {
+                "title": f"recipe {index}",
+                "price": 5,
+                "time_to_get_ready": 5,
+                "tags": [{"name": "dessert"}, {"name": f"tag {index}"}],
+                "ingredients": [{"name": "milk"}],
+            }
+            for index in range(3)
+        ]}
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["created"]), 3)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 1
+        )
+        for recipe_data in res.data["created"]:
+            recipe = Recipe.objects.get(id=recipe_data["id"])
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe_data, RecipeSerializer(recipe).data)
+
+    def test_bulk_update_and_delete_recipes(self):
+        tag = Tag.objects.create(user=self.user, name="dessert")
+        recipe1 = create_recipe(self.user)
+        recipe1.tags.add(tag)
+        recipe2 = create_recipe(self.user)
+        payload = {
+            "update": [
+                {"id": recipe1.id, "title": "new title", "tags": []},
+            ],
+            "delete": [recipe2.id],
+        }
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        self.assertEqual(recipe1.title, "new title")
+        self.assertEqual(recipe1.tags.count(), 0)
+        self.assertEqual(res.data["deleted"], [recipe2.id])
+        self.assertFalse(Recipe.objects.filter(id=recipe2.id).exists())
+
+    def test_bulk_errors_per_item(self):
+        other_user = get_user_model().objects.create_user(
+            email="test2@example.com",
+            password="testpass123",
+        )
+        other_recipe = create_recipe(other_user)
+        payload = {
+            "create": [
+                {"title": "valid", "price": 5, "time_to_get_ready": 5},
+                {"title": "no price", "time_to_get_ready": 5},
+            ],
+            "update": [{"id": other_recipe.id, "title": "mine"}],
+            "delete": [other_recipe.id],
+        }
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["create"][0], {})
+        self.assertIn("price", res.data["create"][1])
+        self.assertIn("id", res.data["update"][0])
+        self.assertIn(0, res.data["delete"])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        other_recipe.refresh_from_db()
+        self.assertNotEqual(other_recipe.title, "mine")
+
+
+class ExportRecipeAPITest(TestCase):
+    """Test streaming export of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.recipe = create_recipe_with_relations(self.user, 0)
+        create_recipe(self.user, {"title": "no relations"})
+        other_user = get_user_model().objects.create_user(
+            email="test2@example.com",
+            password="testpass123",
+        )
+        create_recipe(other_user)
+
+    def get_content(self, res):
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        res = self.client.get(RECIPE_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in self.get_content(res).splitlines()
+        ]
+        self.assertEqual(len(rows), 2)
+        row = rows[1]
+        self.assertEqual(row["id"], self.recipe.id)
+        self.assertEqual(row["price"], "5.00")
+        self.assertEqual(
+            row["tags"],
+            RecipeSerializer(self.recipe).data["tags"],
+        )
+        self.assertEqual(row["ingredients"][0]["name"], "ingredient 0")
+
+    def test_export_csv(self):
+        res = self.client.get(RECIPE_EXPORT_URL, {"file_format": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(self.get_content(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["title"], self.recipe.title)
+        self.assertEqual(rows[1]["tags"], "tag 0")
+        self.assertEqual(rows[0]["tags"], "")
+
+    def test_export_with_filter(self):
+        tag = self.recipe.tags.get()
+
+        res = self.client.get(RECIPE_EXPORT_URL, {"tags": tag.id})
+
+        lines = self.get_content(res).splitlines()
+        self.assertEqual(len(lines), 1)
 
+    def test_export_invalid_format_error(self):
+        res = self.client.get(RECIPE_EXPORT_URL, {"file_format": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CachedRecipeListAPITest(TestCase):
+    """Test ETags and response caching of the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+        create_recipe_with_relations(self.user, 0)
+
+    def test_list_not_modified(self):
+        res = self.client.get(RECIPE_LIST_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_list_not_modified_since(self):
+        res = self.client.get(RECIPE_LIST_URL)
+        last_modified = res["Last-Modified"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPE_LIST_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["Last-Modified"], last_modified)
+
+    def test_list_modified_in_same_second(self):
+        last_modified = self.client.get(RECIPE_LIST_URL)["Last-Modified"]
+
+        create_recipe(self.user, {"title": "new recipe"})
+        res = self.client.get(
+            RECIPE_LIST_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_list_if_none_match_wins(self):
+        res = self.client.get(RECIPE_LIST_URL)
+
+        res = self.client.get(
+            RECIPE_LIST_URL,
+            HTTP_IF_NONE_MATCH='"stale"',
+            HTTP_IF_MODIFIED_SINCE=res["Last-Modified"],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_served_from_cache(self):
+        res = self.client.get(RECIPE_LIST_URL)
+
+        with self.assertNumQueries(0):
+            cached_res = self.client.get(RECIPE_LIST_URL)
+
+        self.assertEqual(cached_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_res.data, res.data)
+
+    def test_list_etag_differs_per_query(self):
+        res = self.client.get(RECIPE_LIST_URL)
+        filtered_res = self.client.get(RECIPE_LIST_URL, {"tags": "1"})
+
+        self.assertNotEqual(res["ETag"], filtered_res["ETag"])
+
+    def test_create_recipe_invalidates_list(self):
+        etag = self.client.get(RECIPE_LIST_URL)["ETag"]
+
+        create_recipe(self.user, {"title": "new recipe"})
+        res = self.client.get(RECIPE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_tag_change_invalidates_list(self):
+        etag = self.client.get(RECIPE_LIST_URL)["ETag"]
+
+        recipe = Recipe.objects.get(user=self.user)
+        recipe.tags.clear()
+        res = self.client.get(RECIPE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["tags"], [])
+
+    def test_bulk_create_invalidates_list(self):
+        etag = self.client.get(RECIPE_LIST_URL)["ETag"]
+
+        payload = {"create": [
+            {"title": "new recipe", "price": 5, "time_to_get_ready": 5},
+        ]}
+        self.client.post(RECIPE_BULK_URL, payload, format="json")
+        res = self.client.get(RECIPE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_other_user_change_keeps_list(self):
+        etag = self.client.get(RECIPE_LIST_URL)["ETag"]
+
+        other_user = get_user_model().objects.create_user(
+            email="test2@example.com",
+            password="testpass123",
+        )
+        create_recipe(other_user)
+        res = self.client.get(RECIPE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Test per-process caches are refused with several processes."""
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_local_cache_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_shared_caches()
+
+    @override_settings(WEB_CONCURRENCY=1)
+    def test_local_cache_single_process(self):
+        check_shared_caches()
+
+    def test_shared_cache_allowed(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        caches_setting = {"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": cache_dir.name,
+        }}
+
+        with override_settings(WEB_CONCURRENCY=4, CACHES=caches_setting):
+            check_shared_caches()
+
+    def test_local_sticky_cache_refused(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        caches_setting = {
+            "default": {
+                "BACKEND": (
+                    "django.core.cache.backends.filebased.FileBasedCache"
+                ),
+                "LOCATION": cache_dir.name,
+            },
+            "sticky": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+        }
+
+        with override_settings(
+            WEB_CONCURRENCY=4,
+            CACHES=caches_setting,
+            REPLICA_STICKY_CACHE_ALIAS="sticky",
+        ):
+            with self.assertRaisesMessage(
+                ImproperlyConfigured, "REPLICA_STICKY_CACHE_ALIAS"
+            ):
+                check_shared_caches()
+
+
+class PaginatedRecipeAPITest(TestCase):
+    """Test keyset pagination of the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_unpaginated_by_default(self):
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPE_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_paginate_through_all_pages(self):
+        recipes = [create_recipe(self.user) for _ in range(5)]
+        expected_ids = [recipe.id for recipe in reversed(recipes)]
+
+        res = self.client.get(RECIPE_LIST_URL, {"page_size": 2})
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_paginate_on_sort_key(self):
+        recipes = [
+            create_recipe(self.user, {"time_to_get_ready": time})
+            for time in [30, 10, 20, 10, 40]
+        ]
+        expected_ids = [
+            recipe.id for recipe in
+            sorted(recipes, key=lambda r: (r.time_to_get_ready, r.id))
+        ]
+
+        params = {"page_size": 2, "ordering": "time_to_get_ready"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_paginate_on_decimal_sort_key(self):
+        recipes = [
+            create_recipe(self.user, {"price": Decimal(price)})
+            for price in ["2.50", "9.99", "2.50", "0.10"]
+        ]
+        expected_ids = [
+            recipe.id for recipe in
+            sorted(recipes, key=lambda r: (-r.price, -r.id))
+        ]
+
+        params = {"page_size": 1, "ordering": "-price"}
+        res = self.client.get(RECIPE_LIST_URL, params)
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_paginate_with_tag_filter(self):
+        tag1 = Tag.objects.create(user=self.user, name="vegeterian")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+        matching = []
+        for _ in range(3):
+            recipe = create_recipe(self.user)
+            recipe.tags.add(tag1, tag2)
+            matching.append(recipe.id)
+        create_recipe(self.user)
+
+        params = {"tags": f"{tag1.id},{tag2.id}", "page_size": 2}
+        res = self.client.get(RECIPE_LIST_URL, params)
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(ids, sorted(matching, reverse=True))
+
+    def test_invalid_page_size_error(self):
+        res = self.client.get(RECIPE_LIST_URL, {"page_size": "zero"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor_error(self):
+        res = self.client.get(RECIPE_LIST_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_error(self):
+        cursors = [
+            ({}, ["x"]),
+            ({}, [None]),
+            ({"ordering": "price"}, ["cheap", 1]),
+            ({"ordering": "price"}, [{"price": 5}, 1]),
+            ({"ordering": "time_to_get_ready"}, [None, 1]),
+        ]
+        for params, values in cursors:
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode())
+
+            res = self.client.get(
+                RECIPE_LIST_URL, {**params, "cursor": cursor.decode()}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+# Tests process images themselves; worker threads would race the test
+# database.
+@override_settings(RECIPE_IMAGE_PROCESSING="command")
 class ImageUploadAPITest(TestCase):
     """Test class for testing upload image functionality."""
 
@@ -517,22 +1316,117 @@ class ImageUploadAPITest(TestCase):
         self.recipe = create_recipe(self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
         self.recipe.image.delete()
+        self.recipe.image_upload.delete()
+        for formats in self.recipe.image_variants.values():
+            for name in formats.values():
+                default_storage.delete(name)
 
-    def test_upload_image(self):
+    def upload_image(self, size=(10, 10)):
         url = image_upload_url(self.recipe.id)
 
         with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
-            img = Image.new("RGB", (10, 10))
+            img = Image.new("RGB", size)
             img.save(image_file, format="JPEG")
             image_file.seek(0)
             payload = {"image": image_file}
-            res = self.client.post(url, payload, format="multipart")
+            return self.client.post(url, payload, format="multipart")
+
+    def test_upload_image(self):
+        res = self.upload_image()
 
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn("image", res.data)
+        self.assertEqual(res.data["image_status"], ImageStatus.PENDING)
+        self.assertTrue(os.path.exists(self.recipe.image_upload.path))
+
+    def test_process_uploaded_image(self):
+        self.upload_image(size=(2000, 1000))
+
+        processed = process_recipe_image(self.recipe.id)
+
+        self.assertTrue(processed)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, ImageStatus.READY)
+        self.assertFalse(self.recipe.image_upload)
         self.assertTrue(os.path.exists(self.recipe.image.path))
+        with Image.open(self.recipe.image.path) as image:
+            self.assertEqual(image.size, (1600, 800))
+        with default_storage.open(
+            self.recipe.image_variants["thumbnail"]["jpeg"]
+        ) as file, Image.open(file) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (400, 200))
+
+        res = self.client.get(recipe_detail_url(self.recipe.id))
+        self.assertEqual(res.data["image_status"], ImageStatus.READY)
+        self.assertTrue(
+            res.data["image_variants"]["large"]["jpeg"].startswith("http")
+        )
+
+    def test_process_replaces_previous_image(self):
+        self.upload_image()
+        process_recipe_image(self.recipe.id)
+        self.recipe.refresh_from_db()
+        old_path = self.recipe.image.path
+
+        self.upload_image()
+        process_recipe_image(self.recipe.id)
+
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_upload_replaces_pending_upload(self):
+        self.upload_image()
+        self.recipe.refresh_from_db()
+        old_path = self.recipe.image_upload.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.upload_image()
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image_upload.path, old_path)
+        self.assertTrue(os.path.exists(self.recipe.image_upload.path))
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_process_corrupt_upload_fails(self):
+        self.recipe.image_upload.save(
+            "broken.jpg", ContentFile(b"not an image"), save=False
+        )
+        self.recipe.image_status = ImageStatus.PENDING
+        self.recipe.save()
+
+        with self.assertLogs("recipe.image_processing", "ERROR"):
+            processed = process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertFalse(processed)
+        self.assertEqual(self.recipe.image_status, ImageStatus.FAILED)
+
+    @patch(
+        "recipe.image_processing.render_variants",
+        side_effect=KeyError("WEBP"),
+    )
+    def test_process_unexpected_error_fails(self, _):
+        self.upload_image()
+
+        with self.assertLogs("recipe.image_processing", "ERROR"):
+            processed = process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertFalse(processed)
+        self.assertEqual(self.recipe.image_status, ImageStatus.FAILED)
+
+    def test_process_recipe_images_command(self):
+        self.upload_image()
+
+        call_command("process_recipe_images", once=True, workers=1,
+                     stdout=io.StringIO())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, ImageStatus.READY)
 
     def test_upload_bad_image_error(self):
         url = image_upload_url(self.recipe.id)
@@ -541,3 +1435,315 @@ class ImageUploadAPITest(TestCase):
         res = self.client.post(url, payload, format="multipart")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImageVariantAPITest(TestCase):
+    """Test on-demand image variants."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(
+            RECIPE_IMAGE_CACHE_DIR=self.cache_dir.name
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.recipe = create_recipe(self.user)
+        buffer = io.BytesIO()
+        Image.new("RGB", (1000, 500)).save(buffer, format="JPEG")
+        self.recipe.image.save("image.jpg", ContentFile(buffer.getvalue()))
+        self.addCleanup(self.recipe.image.delete, save=False)
+
+    def get_cached_files(self):
+        return [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(self.cache_dir.name)
+            for name in names
+        ]
+
+    @skipUnless(features.check("webp"), "Pillow lacks WEBP support.")
+    def test_get_variant(self):
+        res = self.client.get(
+            image_variant_url(self.recipe.id),
+            {"width": 200, "image_format": "webp"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "image/webp")
+        self.assertIn("no-cache", res["Cache-Control"])
+        content = b"".join(res.streaming_content)
+        with Image.open(io.BytesIO(content)) as image:
+            self.assertEqual(image.size, (200, 100))
+        self.assertEqual(len(self.get_cached_files()), 1)
+
+    def test_versioned_url_cached_immutably(self):
+        url = self.client.get(recipe_detail_url(self.recipe.id)).data[
+            "image_url"
+        ]
+
+        res = self.client.get(url + "&width=200")
+        b"".join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertIn("max-age=31536000", res["Cache-Control"])
+
+        self.addCleanup(default_storage.delete, self.recipe.image.name)
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 300), "red").save(buffer, format="JPEG")
+        self.recipe.image.save("image.jpg", ContentFile(buffer.getvalue()))
+        new_url = self.client.get(recipe_detail_url(self.recipe.id)).data[
+            "image_url"
+        ]
+        res = self.client.get(url + "&width=200")
+        b"".join(res.streaming_content)
+
+        self.assertNotEqual(new_url, url)
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    def test_variant_served_from_cache(self):
+        url = image_variant_url(self.recipe.id)
+        first = self.client.get(url, {"width": 200})
+        b"".join(first.streaming_content)
+
+        with patch("recipe.image_cache.render_variant") as patched_render:
+            res = self.client.get(url, {"width": 200})
+            b"".join(res.streaming_content)
+
+        patched_render.assert_not_called()
+        self.assertEqual(res["ETag"], first["ETag"])
+
+    def test_variant_not_modified(self):
+        url = image_variant_url(self.recipe.id)
+        etag = self.client.get(url, {"width": 200})["ETag"]
+
+        res = self.client.get(url, {"width": 200}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_replaced_image_changes_etag(self):
+        url = image_variant_url(self.recipe.id)
+        etag = self.client.get(url, {"width": 200})["ETag"]
+
+        self.addCleanup(default_storage.delete, self.recipe.image.name)
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 300), "red").save(buffer, format="JPEG")
+        self.recipe.image.save("image.jpg", ContentFile(buffer.getvalue()))
+        res = self.client.get(url, {"width": 200}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        b"".join(res.streaming_content)
+
+    def test_invalid_width_error(self):
+        res = self.client.get(
+            image_variant_url(self.recipe.id), {"width": 123}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipe_without_image_not_found(self):
+        recipe = create_recipe(self.user)
+
+        res = self.client.get(image_variant_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_evicts_least_recently_used(self):
+        url = image_variant_url(self.recipe.id)
+        with override_settings(RECIPE_IMAGE_CACHE_MAX_BYTES=1):
+            for width in [100, 200]:
+                res = self.client.get(url, {"width": width})
+                b"".join(res.streaming_content)
+
+        files = self.get_cached_files()
+        self.assertEqual(len(files), 1)
+        self.assertIn(
+            variant_key(source_digest(self.recipe.image.name), 200, "jpeg"),
+            files[0],
+        )
+
+    def test_cache_scanned_only_when_full(self):
+        url = image_variant_url(self.recipe.id)
+        with patch("recipe.image_cache.os.walk", wraps=os.walk) as walk:
+            for width in [100, 200, 400]:
+                res = self.client.get(url, {"width": width})
+                b"".join(res.streaming_content)
+
+        self.assertEqual(walk.call_count, 1)
+        self.assertEqual(len(self.get_cached_files()), 3)
+
+
+@override_settings(RECIPE_IMAGE_PROCESSING="command")
+class ChunkedImageUploadAPITest(TestCase):
+    """Test chunked, resumable image uploads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.recipe = create_recipe(self.user)
+        buffer = io.BytesIO()
+        Image.new("RGB", (200, 100)).save(buffer, format="PNG")
+        self.content = buffer.getvalue()
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        self.recipe.image_upload.delete()
+        for upload in self.recipe.image_uploads.all():
+            default_storage.delete(upload.part_name)
+
+    def start_upload(self, content, **extra):
+        payload = {"filename": "image.png", "size": len(content), **extra}
+        res = self.client.post(image_uploads_url(self.recipe.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return image_upload_detail_url(self.recipe.id, res.data["id"])
+
+    def send_chunk(self, url, offset, chunk):
+        return self.client.patch(
+            url,
+            chunk,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_upload_in_chunks(self):
+        url = self.start_upload(
+            self.content,
+            sha256=hashlib.sha256(self.content).hexdigest(),
+        )
+        middle = len(self.content) // 2
+
+        res = self.send_chunk(url, 0, self.content[:middle])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["offset"], middle)
+        upload_id = res.data["id"]
+
+        res = self.send_chunk(url, middle, self.content[middle:])
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["id"], upload_id)
+        self.assertEqual(res.data["offset"], len(self.content))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, ImageStatus.PENDING)
+        self.assertFalse(self.recipe.image_uploads.exists())
+        with self.recipe.image_upload.open("rb") as file:
+            self.assertEqual(file.read(), self.content)
+
+        self.assertTrue(process_recipe_image(self.recipe.id))
+        self.recipe.refresh_from_db()
+        for formats in self.recipe.image_variants.values():
+            for name in formats.values():
+                self.addCleanup(default_storage.delete, name)
+        self.assertEqual(self.recipe.image_status, ImageStatus.READY)
+
+    def test_resume_from_offset(self):
+        url = self.start_upload(self.content)
+        self.send_chunk(url, 0, self.content[:100])
+
+        res = self.send_chunk(url, 0, self.content)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["offset"], 100)
+
+        res = self.client.get(url)
+        self.assertEqual(res["Upload-Offset"], "100")
+
+        res = self.send_chunk(url, 100, self.content[100:])
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+    def test_chunk_racing_another_conflicts(self):
+        url = self.start_upload(self.content)
+        spool_chunk = uploads.spool_chunk
+
+        def spool_while_another_writes(stream, content_length):
+            patched_spool.side_effect = spool_chunk
+            self.send_chunk(url, 0, self.content[:100])
+            return spool_chunk(stream, content_length)
+
+        with patch("recipe.views.spool_chunk") as patched_spool:
+            patched_spool.side_effect = spool_while_another_writes
+            res = self.send_chunk(url, 0, self.content[:50])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["offset"], 100)
+        upload = self.recipe.image_uploads.get()
+        with default_storage.open(upload.part_name) as file:
+            self.assertEqual(file.read(), self.content[:100])
+
+    def test_bad_header_rejected(self):
+        content = b"not an image" * 10
+        url = self.start_upload(content)
+
+        res = self.send_chunk(url, 0, content)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.recipe.image_uploads.exists())
+
+    def test_checksum_mismatch_rejected(self):
+        url = self.start_upload(self.content, sha256="0" * 64)
+
+        res = self.send_chunk(url, 0, self.content)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, ImageStatus.NONE)
+
+    def test_chunk_past_size_error(self):
+        url = self.start_upload(self.content)
+
+        res = self.send_chunk(url, 0, self.content + b"extra")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(self.recipe.image_uploads.exists())
+
+    @override_settings(RECIPE_IMAGE_UPLOAD_MAX_BYTES=10)
+    def test_upload_too_large_error(self):
+        payload = {"filename": "image.png", "size": len(self.content)}
+
+        res = self.client.post(image_uploads_url(self.recipe.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancel_upload(self):
+        url = self.start_upload(self.content)
+        self.send_chunk(url, 0, self.content[:100])
+
+        res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.recipe.image_uploads.exists())
+
+    def test_expire_abandoned_uploads(self):
+        self.send_chunk(self.start_upload(self.content), 0, self.content[:100])
+        abandoned = self.recipe.image_uploads.get()
+        abandoned_path = default_storage.path(abandoned.part_name)
+        self.recipe.image_uploads.update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        self.send_chunk(self.start_upload(self.content), 0, self.content[:100])
+        orphan_name = default_storage.save(
+            "uploads/partial/orphan.part", ContentFile(b"partial")
+        )
+        orphan_path = default_storage.path(orphan_name)
+        os.utime(orphan_path, (0, 0))
+        out = io.StringIO()
+
+        call_command("expire_image_uploads", stdout=out)
+
+        self.assertEqual(self.recipe.image_uploads.count(), 1)
+        self.assertFalse(os.path.exists(abandoned_path))
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertIn("Discarded 2 image uploads", out.getvalue())
@@ -10,9 +10,11 @@ from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 from decimal import Decimal
+from unittest.mock import patch
 
 
 TAG_LIST_URL = reverse("recipe:tag-list")
+TAG_AUTOCOMPLETE_URL = reverse("recipe:tag-autocomplete")
 
 
 def detail_tag_url(id):
@@ -80,6 +82,23 @@ class PrivateTagAPITest(TestCase):
         self.assertEqual(res.data[0]["name"], tag.name)
         self.assertEqual(res.data[0]["id"], tag.id)
 
+    def test_tag_list_invalidated_by_recipe_creation(self):
+        etag = self.client.get(TAG_LIST_URL)["ETag"]
+
+        payload = {
+            "title": "some food",
+            "time_to_get_ready": 5,
+            "price": "5.25",
+            "tags": [{"name": "dinner"}],
+        }
+        self.client.post(
+            reverse("recipe:recipe-list"), payload, format="json"
+        )
+        res = self.client.get(TAG_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["name"], "dinner")
+
     def test_update_tag(self):
         tag = create_tag(self.user)
 
@@ -91,6 +110,16 @@ class PrivateTagAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(tag.name, tag_update["name"])
 
+    def test_update_tag_to_existing_name_error(self):
+        tag = create_tag(self.user)
+        create_tag(self.user, "dessert")
+
+        res = self.client.patch(detail_tag_url(tag.id), {"name": "dessert"})
+
+        tag.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(tag.name, "vegan")
+
     def test_delete_tag(self):
         tag = create_tag(self.user)
 
@@ -155,3 +184,97 @@ class PrivateTagAPITest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data), 1)
+
+    def test_order_tags_by_popularity(self):
+        tag1 = create_tag(self.user, "lunch")
+        tag2 = create_tag(self.user, "vegan")
+        tag3 = create_tag(self.user, "dessert")
+        for _ in range(2):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title="some food",
+                time_to_get_ready=5,
+                price=Decimal("5.25"),
+            )
+            recipe.tags.add(tag2)
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAG_LIST_URL, {"ordering": "popularity"})
+
+        self.assertEqual(
+            [tag["id"] for tag in res.data], [tag2.id, tag1.id, tag3.id]
+        )
+
+    def test_invalid_ordering_error(self):
+        res = self.client.get(TAG_LIST_URL, {"ordering": "recipe"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_prefix(self):
+        vegan = create_tag(self.user, "Vegan")
+        vegetarian = create_tag(self.user, "vegetarian")
+        create_tag(self.user, "Dessert")
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {"id": vegan.id, "name": "Vegan"},
+            {"id": vegetarian.id, "name": "vegetarian"},
+        ])
+
+    def test_autocomplete_substring(self):
+        tag = create_tag(self.user, "Quick lunch")
+        create_tag(self.user, "Dinner")
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {"q": "LUNCH"})
+
+        self.assertEqual(res.data, [{"id": tag.id, "name": "Quick lunch"}])
+
+    def test_autocomplete_only_for_user(self):
+        another_user = get_user_model().objects.create_user(
+            email="test2@email.com",
+            password="testpass1234",
+        )
+        create_tag(another_user, "vegan")
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+
+        self.assertEqual(res.data, [])
+
+    def test_autocomplete_limit(self):
+        for index in range(60):
+            create_tag(self.user, f"tag {index}")
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "tag"})
+        self.assertEqual(len(res.data), 10)
+
+        res = self.client.get(
+            TAG_AUTOCOMPLETE_URL, {"prefix": "tag", "limit": 1000}
+        )
+        self.assertEqual(len(res.data), 50)
+
+    def test_autocomplete_requires_term(self):
+        res = self.client.get(TAG_AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_narrows_cached_prefix(self):
+        create_tag(self.user, "vegan")
+        create_tag(self.user, "vegetarian")
+        self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "ve"})
+
+        with patch("recipe.autocomplete._query") as patched_query:
+            self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+            res = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "vega"})
+
+        patched_query.assert_not_called()
+        self.assertEqual([tag["name"] for tag in res.data], ["vegan"])
+
+    def test_autocomplete_invalidated_by_new_tag(self):
+        self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+        tag = create_tag(self.user, "vegan")
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+
+        self.assertEqual(res.data, [{"id": tag.id, "name": "vegan"}])
@@ -0,0 +1,192 @@
+"""
+Chunked, resumable uploads of recipe images.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from PIL import Image
+
+from core.models import RecipeImageUpload, recipe_image_staging_file_path
+from recipe.image_processing import (
+    enqueue_image_processing,
+    stage_image_upload,
+)
+
+
+PARTIAL_DIR = os.path.join("uploads", "partial")
+CHUNK_SIZE = 64 * 1024
+# Enough bytes for Pillow to parse the header, including large EXIF blocks.
+SNIFF_BYTES = 256 * 1024
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+
+class UploadError(Exception):
+    """Raised when a chunk can't be accepted."""
+
+
+class OffsetMismatch(UploadError):
+    """Raised when a chunk doesn't start at the current upload offset."""
+
+
+class InvalidUpload(UploadError):
+    """Raised when the uploaded file is rejected as a whole."""
+
+
+def sniff_image(head):
+    """Check the first bytes of an upload are a supported image header."""
+    try:
+        with Image.open(io.BytesIO(head)) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise InvalidUpload("File is not a supported image.")
+
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidUpload(f"Image format {image_format} is not supported.")
+    if width * height > Image.MAX_IMAGE_PIXELS:
+        raise InvalidUpload("Image dimensions are too large.")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _check_header(upload, path):
+    if upload.header_checked:
+        return
+    if upload.offset < min(SNIFF_BYTES, upload.size):
+        return
+
+    with open(path, "rb") as file:
+        sniff_image(file.read(SNIFF_BYTES))
+    upload.header_checked = True
+
+
+def check_chunk(upload, offset, content_length):
+    """Check a chunk of content_length bytes at offset fits the upload."""
+    if offset != upload.offset:
+        raise OffsetMismatch(
+            f"Upload offset is {upload.offset}, got {offset}."
+        )
+    if offset + content_length > upload.size:
+        raise UploadError("Chunk exceeds the declared upload size.")
+
+
+def spool_chunk(stream, content_length):
+    """Copy up to content_length bytes of a request body to a temporary
+    file, so a slow client holds no lock or connection while sending."""
+    chunk = tempfile.TemporaryFile()
+    remaining = content_length
+    while remaining:
+        data = stream.read(min(CHUNK_SIZE, remaining))
+        if not data:
+            break
+        chunk.write(data)
+        remaining -= len(data)
+    chunk.seek(0)
+
+    return chunk
+
+
+def write_chunk(upload, offset, stream, content_length):
+    """Append a spooled chunk to an upload, CHUNK_SIZE at a time.
+
+    Callers hold a select_for_update lock on the upload, so two requests
+    never write the same upload at once. Bytes past the recorded offset,
+    left by an interrupted request, are discarded first so the client can
+    resume from the recorded offset.
+    """
+    check_chunk(upload, offset, content_length)
+
+    path = default_storage.path(upload.part_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "r+b" if os.path.exists(path) else "wb"
+    with open(path, mode) as file:
+        file.seek(offset)
+        file.truncate()
+        remaining = content_length
+        while remaining:
+            data = stream.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            file.write(data)
+            remaining -= len(data)
+            upload.offset += len(data)
+            if not upload.header_checked:
+                file.flush()
+                _check_header(upload, path)
+
+    upload.save(update_fields=["offset", "header_checked"])
+
+
+def complete_upload(upload):
+    """Stage a fully received upload for image processing."""
+    part_path = default_storage.path(upload.part_name)
+    if upload.sha256 and _file_sha256(part_path) != upload.sha256:
+        raise InvalidUpload("Checksum of the uploaded file doesn't match.")
+
+    recipe = upload.recipe
+    staged_name = recipe_image_staging_file_path(recipe, upload.filename)
+    staged_path = default_storage.path(staged_name)
+    os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+    os.replace(part_path, staged_path)
+
+    with transaction.atomic():
+        stage_image_upload(recipe, staged_name)
+        upload.delete()
+        enqueue_image_processing(recipe.id)
+
+    return recipe
+
+
+def discard_upload(upload):
+    default_storage.delete(upload.part_name)
+    upload.delete()
+
+
+def expire_uploads(max_age=None):
+    """Discard uploads started more than max_age seconds ago.
+
+    Partial files left without an upload, e.g. after their recipe was
+    deleted, are removed once they are as old. Returns the number of
+    uploads and orphaned files removed.
+    """
+    if max_age is None:
+        max_age = settings.RECIPE_IMAGE_UPLOAD_MAX_AGE
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+
+    expired = 0
+    for upload in RecipeImageUpload.objects.filter(created__lt=cutoff):
+        discard_upload(upload)
+        expired += 1
+
+    try:
+        _, names = default_storage.listdir(PARTIAL_DIR)
+    except FileNotFoundError:
+        names = []
+    live = {
+        os.path.basename(upload.part_name)
+        for upload in RecipeImageUpload.objects.only("id")
+    }
+    for name in set(names) - live:
+        part_name = os.path.join(PARTIAL_DIR, name)
+        if default_storage.get_modified_time(part_name) < cutoff:
+            default_storage.delete(part_name)
+            expired += 1
+
+    return expired
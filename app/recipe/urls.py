@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
-from recipe import views
+from recipe import async_views, views
 
 
 router = routers.DefaultRouter()
@@ -12,5 +12,21 @@ router.register("ingredients", views.IngredientViewSet)
 app_name = "recipe"
 
 urlpatterns = [
-    path("", include(router.urls))
+    path("", include(router.urls)),
+    path(
+        "async/recipes/",
+        async_views.recipe_list,
+        name="async-recipe-list",
+    ),
+    path(
+        "async/recipes/<int:pk>/",
+        async_views.recipe_detail,
+        name="async-recipe-detail",
+    ),
+    path("async/tags/", async_views.tag_list, name="async-tag-list"),
+    path(
+        "async/ingredients/",
+        async_views.ingredient_list,
+        name="async-ingredient-list",
+    ),
 ]
@@ -1,20 +1,59 @@
 from recipe.serializers import (
+    RecipeBulkSerializer,
     RecipeSerializer,
     RecipeDetailSerializer,
+    RecipeFilterSerializer,
     RecipeImageSerializer,
+    RecipeImageUploadSerializer,
     TagSerializer,
-    IngredientSerializer
+    IngredientSerializer,
+    RECIPE_ORDERINGS,
 )
+from recipe.pagination import KeysetPagination
+from recipe.filters import filter_by_related, MATCH_ANY, MATCH_ALL
+from recipe.exporters import EXPORTERS
+from recipe.cache import CachedListMixin
+from recipe.fast_serializers import FastListMixin
+from recipe.search import search_enabled, search_recipes
+from recipe.autocomplete import DEFAULT_LIMIT, MAX_LIMIT, autocomplete
+from recipe.image_processing import (
+    VARIANT_FORMATS,
+    enqueue_image_processing,
+)
+from recipe.image_cache import (
+    ALLOWED_WIDTHS,
+    get_variant,
+    source_digest,
+    variant_key,
+)
+from recipe.uploads import (
+    InvalidUpload,
+    OffsetMismatch,
+    UploadError,
+    check_chunk,
+    complete_upload,
+    discard_upload,
+    spool_chunk,
+    write_chunk,
+)
+from user.authentication import CachedTokenAuthentication
+from core.db.replicas import ReplicaReadMixin
 from core.models import Recipe, Tag, Ingredient
 
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
+
 from rest_framework import (
-    authentication,
     permissions,
     status,
     viewsets,
     mixins,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from drf_spectacular.utils import (
@@ -37,50 +76,438 @@ from drf_spectacular.utils import (
                 "ingredients",
                 OpenApiTypes.STR,
                 description="Comma seperated list of ids to filter",
-            )
+            ),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR, enum=[MATCH_ANY, MATCH_ALL],
+                description="Match any (default) or all of the given ids.",
+            ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Full-text search over title, description "
+                            "and ingredient names, best matches first.",
+            ),
+            OpenApiParameter(
+                "max_time",
+                OpenApiTypes.INT,
+                description="Maximum time to get ready.",
+            ),
+            OpenApiParameter(
+                "min_price",
+                OpenApiTypes.DECIMAL,
+                description="Minimum price.",
+            ),
+            OpenApiParameter(
+                "max_price",
+                OpenApiTypes.DECIMAL,
+                description="Maximum price.",
+            ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=RECIPE_ORDERINGS,
+                description="Sort field, prefixed with - for descending. "
+                            "Newest first by default.",
+            ),
+            OpenApiParameter(
+                "fields",
+                OpenApiTypes.STR,
+                description="Comma separated list of fields to return.",
+            ),
         ]
-    )
+    ),
+    retrieve=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "fields",
+                OpenApiTypes.STR,
+                description="Comma separated list of fields to return.",
+            ),
+        ]
+    ),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin,
+                    CachedListMixin,
+                    FastListMixin,
+                    viewsets.ModelViewSet):
     """Managing Recipes in database."""
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_id_list(self, qs):
         return [int(id_str) for id_str in qs.split(",")]
 
+    def get_nested_querysets(self):
+        return {
+            "tags": Tag.objects.order_by("id"),
+            "ingredients": Ingredient.objects.order_by("id"),
+        }
+
+    def get_serializer_fields(self):
+        """Return the names of the fields the response will contain."""
+        requested = self.get_requested_fields()
+        if requested is not None:
+            return requested
+
+        return getattr(self.get_serializer_class().Meta, "fields", [])
+
+    def get_requested_fields(self):
+        """Return the fields asked for with `fields`, None meaning all.
+
+        Only reads honour `fields`; writes always respond in full.
+        """
+        fields = self.request.query_params.get("fields")
+        if not fields or self.action not in ("list", "retrieve"):
+            return None
+
+        requested = [name.strip() for name in fields.split(",")]
+        available = self.get_serializer_class().Meta.fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(unknown)}."}
+            )
+
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_prefetches(self):
+        """Return prefetches matching the nested fields of the serializer."""
+        fields = self.get_serializer_fields()
+
+        return [
+            Prefetch(field, queryset=queryset)
+            for field, queryset in self.get_nested_querysets().items()
+            if field in fields
+        ]
+
+    def get_only_columns(self):
+        """Return the columns to load for `fields`, None meaning all.
+
+        The sort keys are always loaded so pagination can build cursors
+        without fetching them row by row.
+        """
+        requested = self.get_requested_fields()
+        if requested is None:
+            return None
+
+        names = {"id"} | set(requested) | {
+            field.lstrip("-") for field in self.get_ordering()
+        }
+
+        return [
+            field.name for field in Recipe._meta.concrete_fields
+            if field.name in names
+        ]
+
+    def get_search(self):
+        return self.request.query_params.get("search", "").strip()
+
+    def get_filters(self):
+        """Return the validated range filters and ordering of the list."""
+        if not hasattr(self, "_filters"):
+            serializer = RecipeFilterSerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._filters = serializer.validated_data
+
+        return self._filters
+
+    def get_ordering(self):
+        """Return the ordering of results, which also keys pagination.
+
+        The id breaks ties in the direction of the sort field, matching
+        the (user, field, id) indexes.
+        """
+        ordering = self.get_filters().get("ordering")
+        if ordering in ("id", "-id"):
+            return (ordering,)
+        if ordering:
+            return (ordering, "-id" if ordering.startswith("-") else "id")
+
+        if self.get_search() and search_enabled(self.queryset.db):
+            return ("-search_rank", "-id")
+
+        return ("-id",)
+
     def get_queryset(self):
         tags = self.request.query_params.get("tags")
         ingredients = self.request.query_params.get("ingredients")
+        match = self.request.query_params.get("match", MATCH_ANY)
+        search = self.get_search()
         queryset = self.queryset
 
+        if match not in (MATCH_ANY, MATCH_ALL):
+            raise ValidationError(
+                {"match": f"Must be '{MATCH_ANY}' or '{MATCH_ALL}'."}
+            )
+
         if tags:
             tags_id_list = self.get_id_list(tags)
-            queryset = queryset.filter(tags__id__in=tags_id_list)
+            queryset = filter_by_related(
+                queryset, "tags", tags_id_list, match
+            )
 
         if ingredients:
             ingredients_id_list = self.get_id_list(ingredients)
-            queryset = queryset.filter(
-                ingredients__id__in=ingredients_id_list
+            queryset = filter_by_related(
+                queryset, "ingredients", ingredients_id_list, match
             )
 
-        return queryset.filter(
+        if search:
+            queryset = search_recipes(queryset, search)
+
+        filters = self.get_filters()
+        for param, lookup in [
+            ("max_time", "time_to_get_ready__lte"),
+            ("min_price", "price__gte"),
+            ("max_price", "price__lte"),
+        ]:
+            if param in filters:
+                queryset = queryset.filter(**{lookup: filters[param]})
+
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by("-id").distinct()
+        ).defer("search_vector")
+
+        columns = self.get_only_columns()
+        if columns is not None:
+            queryset = queryset.only(*columns)
+
+        return queryset.order_by(
+            *self.get_ordering()
+        ).prefetch_related(*self.get_prefetches())
 
     def get_serializer_class(self):
         if self.action == "list":
             return RecipeSerializer
         elif self.action == "upload_image":
             return RecipeImageSerializer
+        elif self.action == "bulk":
+            return RecipeBulkSerializer
+        elif self.action in ["image_uploads", "image_upload_detail"]:
+            return RecipeImageUploadSerializer
 
         return self.serializer_class
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+
+        if serializer.is_valid():
+            result = serializer.save()
+            recipes = Recipe.objects.prefetch_related(*[
+                Prefetch(field, queryset=queryset)
+                for field, queryset in self.get_nested_querysets().items()
+            ]).in_bulk([
+                recipe.id
+                for recipe in result["created"] + result["updated"]
+            ])
+
+            data = {}
+            for key in ["created", "updated"]:
+                data[key] = RecipeSerializer(
+                    [recipes[recipe.id] for recipe in result[key]],
+                    many=True,
+                    context=self.get_serializer_context(),
+                ).data
+            data["deleted"] = result["deleted"]
+
+            return Response(data, status.HTTP_200_OK)
+
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                OpenApiTypes.STR, enum=list(EXPORTERS),
+                description="Export file format, ndjson by default.",
+            ),
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        file_format = request.query_params.get("file_format", "ndjson")
+        if file_format not in EXPORTERS:
+            raise ValidationError(
+                {"file_format": f"Must be one of {', '.join(EXPORTERS)}."}
+            )
+
+        exporter, content_type = EXPORTERS[file_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            exporter(queryset.prefetch_related(None)),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{file_format}"'
+        )
+
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "width",
+                OpenApiTypes.INT, enum=list(ALLOWED_WIDTHS),
+                description="Maximum width and height, 400 by default.",
+            ),
+            OpenApiParameter(
+                "image_format",
+                OpenApiTypes.STR, enum=list(VARIANT_FORMATS),
+                description="Image format, jpeg by default.",
+            ),
+            OpenApiParameter(
+                "v",
+                OpenApiTypes.STR,
+                description="Image version from image_url; responses "
+                            "for the current version are immutable.",
+            ),
+        ],
+        responses={(200, "image/*"): OpenApiTypes.BINARY},
+    )
+    @action(methods=["GET"], detail=True, url_path="image")
+    def image(self, request, pk=None):
+        try:
+            width = int(request.query_params.get("width", 400))
+        except ValueError:
+            width = None
+        if width not in ALLOWED_WIDTHS:
+            raise ValidationError(
+                {"width": f"Must be one of {ALLOWED_WIDTHS}."}
+            )
+
+        image_format = request.query_params.get("image_format", "jpeg")
+        if image_format not in VARIANT_FORMATS:
+            raise ValidationError(
+                {"image_format": f"Must be one of {list(VARIANT_FORMATS)}."}
+            )
+
+        recipe = self.get_object()
+        if not recipe.image:
+            raise Http404
+
+        # Under the versioned image_url of the recipe, the URL names the
+        # content and responses never change. Without it, or with a
+        # stale version, clients revalidate the ETag.
+        digest = source_digest(recipe.image.name)
+        etag = quote_etag(variant_key(digest, width, image_format))
+        if request.query_params.get("v") == digest:
+            cache_control = "private, max-age=31536000, immutable"
+        else:
+            cache_control = "private, no-cache"
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and etag in parse_etags(if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+
+        path = get_variant(recipe.image, width, image_format)
+        response = FileResponse(
+            open(path, "rb"), content_type=f"image/{image_format}"
+        )
+        for header, value in headers.items():
+            response[header] = value
+
+        return response
+
+    @action(methods=["POST"], detail=True, url_path="image-uploads")
+    def image_uploads(self, request, pk=None):
+        recipe = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+
+        if serializer.is_valid():
+            serializer.save(recipe=recipe)
+            return Response(serializer.data, status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "Upload-Offset",
+                OpenApiTypes.INT,
+                location=OpenApiParameter.HEADER,
+                description="Offset of the chunk in the body (PATCH).",
+            ),
+        ],
+        request={"application/offset+octet-stream": OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET", "PATCH", "DELETE"],
+        detail=True,
+        url_path=r"image-uploads/(?P<upload_id>[0-9a-f-]+)",
+    )
+    def image_upload_detail(self, request, pk=None, upload_id=None):
+        recipe = self.get_object()
+        upload = get_object_or_404(recipe.image_uploads, id=upload_id)
+
+        if request.method == "DELETE":
+            discard_upload(upload)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        response_status = status.HTTP_200_OK
+        if request.method == "PATCH":
+            try:
+                offset = int(request.headers["Upload-Offset"])
+                content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+            except (KeyError, ValueError):
+                raise ValidationError(
+                    {"Upload-Offset": "Must be an integer header."}
+                )
+
+            try:
+                # Fail fast before receiving the body; the check is
+                # repeated under the lock.
+                check_chunk(upload, offset, content_length)
+                with spool_chunk(request.stream, content_length) as chunk:
+                    # Lock the row only for the local append, so a retried
+                    # request waits for the original and sees its offset.
+                    with transaction.atomic():
+                        upload = get_object_or_404(
+                            recipe.image_uploads.select_for_update(),
+                            id=upload_id,
+                        )
+                        write_chunk(upload, offset, chunk, content_length)
+                        # Serialized before completing deletes the upload.
+                        data = self.get_serializer(upload).data
+                        if upload.offset == upload.size:
+                            complete_upload(upload)
+                            response_status = status.HTTP_202_ACCEPTED
+            except OffsetMismatch as error:
+                return Response(
+                    {"detail": str(error), "offset": upload.offset},
+                    status.HTTP_409_CONFLICT,
+                    headers={"Upload-Offset": str(upload.offset)},
+                )
+            except InvalidUpload as error:
+                discard_upload(upload)
+                raise ValidationError({"detail": str(error)})
+            except UploadError as error:
+                raise ValidationError({"detail": str(error)})
+        else:
+            data = self.get_serializer(upload).data
+
+        return Response(
+            data,
+            response_status,
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
         recipe = self.get_object()
@@ -88,7 +515,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data, status.HTTP_200_OK)
+            enqueue_image_processing(recipe.id)
+            return Response(serializer.data, status.HTTP_202_ACCEPTED)
 
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
@@ -100,31 +528,106 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 "assigned_only",
                 OpenApiTypes.INT, enum=[0, 1],
                 description="Filter by items assigend by recipe.",
-            )
+            ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR, enum=["name", "-name", "popularity"],
+                description="Sort order, -name by default. Popularity "
+                            "puts the items used by most recipes first.",
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.ListModelMixin,
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            CachedListMixin,
+                            mixins.ListModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
     """Base viewset for recipe attribute."""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    orderings = {
+        "name": ("name",),
+        "-name": ("-name",),
+        "popularity": ("-recipe_count", "name"),
+    }
+
     def get_queryset(self):
         assigned_only = bool(
             int(self.request.query_params.get("assigned_only", "0"))
         )
+        ordering = self.request.query_params.get("ordering", "-name")
         queryset = self.queryset
 
+        if ordering not in self.orderings:
+            raise ValidationError(
+                {"ordering": f"Must be one of {', '.join(self.orderings)}."}
+            )
+
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
 
         return queryset.filter(
             user=self.request.user
-        ).order_by("-name").distinct()
+        ).order_by(*self.orderings[ordering])
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({"name": "This name is already in use."})
+
+    def get_autocomplete_limit(self):
+        try:
+            limit = int(self.request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({"limit": "Must be a positive integer."})
+
+        return min(limit, MAX_LIMIT)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "prefix",
+                OpenApiTypes.STR,
+                description="Start of the name, ignoring case.",
+            ),
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description="Text anywhere in the name, ignoring case.",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description=f"Maximum number of results, {DEFAULT_LIMIT} "
+                            f"by default and at most {MAX_LIMIT}.",
+            ),
+        ],
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        prefix = request.query_params.get("prefix", "")
+        q = request.query_params.get("q", "")
+        if not prefix and not q:
+            raise ValidationError(
+                {"prefix": "Either prefix or q is required."}
+            )
+
+        # Rows are already in the shape of the serializer output.
+        return Response(autocomplete(
+            self.queryset.model,
+            request.user.id,
+            prefix=prefix,
+            q=q,
+            limit=self.get_autocomplete_limit(),
+        ))
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -0,0 +1,79 @@
+"""
+Authentication classes for the APIs.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.lru import LRUCache
+
+
+local_token_cache = LRUCache(
+    max_size=settings.TOKEN_AUTH_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_AUTH_CACHE_TTL,
+)
+
+
+def _shared_token_cache():
+    alias = settings.TOKEN_AUTH_SHARED_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f"auth:token:{key}"
+
+
+def invalidate_token(key):
+    """Drop a token from the local and shared caches."""
+    local_token_cache.delete(key)
+    shared_cache = _shared_token_cache()
+    if shared_cache is not None:
+        shared_cache.delete(_shared_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching which user a token belongs to.
+
+    The user id of a token is looked up in an in-process LRU first, then
+    in the optional shared cache, and only then in the token table. The
+    user itself is always loaded fresh by primary key, so views never see
+    or save a stale copy and no cache holds password hashes. Entries are
+    dropped when the token is deleted; other processes see the change
+    once their local entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = local_token_cache.get(key)
+
+        shared_cache = _shared_token_cache()
+        if user_id is None and shared_cache is not None:
+            user_id = shared_cache.get(_shared_key(key))
+            if user_id is not None:
+                local_token_cache.set(key, user_id)
+
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            local_token_cache.set(key, user.id)
+            if shared_cache is not None:
+                shared_cache.set(
+                    _shared_key(key), user.id, settings.TOKEN_AUTH_CACHE_TTL
+                )
+            return (user, token)
+
+        try:
+            user = get_user_model()._default_manager.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            invalidate_token(key)
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        return (user, self.get_model()(key=key, user=user))
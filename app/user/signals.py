@@ -0,0 +1,15 @@
+"""
+Signal handlers invalidating cached authentication tokens.
+"""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
 
 USER_CREATE_URL = reverse("user:create")
 USER_TOKEN_URL = reverse("user:token")
@@ -142,3 +143,77 @@ class PrivateUserApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(self.user.name, user_detail["name"])
         self.assertTrue(self.user.check_password(user_detail["password"]))
+
+
+class TokenAuthenticationApiTest(TestCase):
+    """Test APIs authenticated with cached tokens."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            name="test name",
+            password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_cached(self):
+        self.client.get(USER_PROFILE_URL)
+
+        # Only the user is loaded, by primary key.
+        with self.assertNumQueries(1):
+            res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        self.client.get(USER_PROFILE_URL)
+
+        self.token.delete()
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(USER_PROFILE_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_visible(self):
+        self.client.patch(USER_PROFILE_URL, {"name": "updated name"})
+
+        res = self.client.get(USER_PROFILE_URL)
+
+        self.assertEqual(res.data["name"], "updated name")
+
+    def test_deactivated_elsewhere_rejected(self):
+        self.client.get(USER_PROFILE_URL)
+
+        # update() sends no signals, like a change made by another process.
+        get_user_model().objects.filter(id=self.user.id).update(
+            is_active=False
+        )
+        res = self.client.patch(USER_PROFILE_URL, {"name": "B"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_update_keeps_password_changed_elsewhere(self):
+        self.client.get(USER_PROFILE_URL)
+        self.user.set_password("newpass123")
+        get_user_model().objects.filter(id=self.user.id).update(
+            password=self.user.password
+        )
+
+        res = self.client.patch(USER_PROFILE_URL, {"name": "B"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("newpass123"))
@@ -1,9 +1,10 @@
 from user.serializers import UserSerializer, AuthTokenSerializer
+from user.authentication import CachedTokenAuthentication
 
 from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 
 
 class CreateUserView(CreateAPIView):
@@ -23,7 +24,7 @@ class UserProfileView(RetrieveUpdateAPIView):
     """View for get or updating pofile"""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):